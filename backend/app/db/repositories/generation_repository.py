@@ -20,6 +20,12 @@ class GenerationRepository:
         await self.session.refresh(generated_content)
         return generated_content
     
+    async def create_many(self, generated_contents: List[GeneratedContent]) -> List[GeneratedContent]:
+        """Créer plusieurs contenus générés en une seule transaction."""
+        self.session.add_all(generated_contents)
+        await self.session.commit()
+        return generated_contents
+    
     async def get_by_id(self, content_id: str) -> Optional[GeneratedContent]:
         """Récupérer un contenu généré par son ID."""
         stmt = select(GeneratedContent).where(GeneratedContent.id == content_id)
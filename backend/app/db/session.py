@@ -2,6 +2,7 @@
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator, Any
 
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
     create_async_engine,
@@ -24,6 +25,22 @@ async_engine = create_async_engine(
     poolclass=NullPool if settings.test_database else None,
 )
 
+
+if settings.database_url.startswith("sqlite"):
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """
+        Active le mode WAL sur chaque nouvelle connexion SQLite.
+        Les lecteurs ne bloquent plus les écrivains (et inversement), ce qui évite
+        que les tests qui inspectent skyent.db se sérialisent sur le verrou de l'application.
+        """
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA wal_autocheckpoint=1000")
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.close()
+
 # Créer la factory de session
 async_session = async_sessionmaker(
     bind=async_engine,
@@ -1,5 +1,5 @@
 # backend/app/generation/router.py
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import Dict, List, Optional, Any, Union
 
 from .models import (
@@ -9,6 +9,8 @@ from .models import (
     ContentTone
 )
 from .service import generation_service
+from app.db.repositories import GenerationRepository
+from app.db.dependencies import get_generation_repository
 
 router = APIRouter()
 
@@ -59,14 +61,17 @@ async def get_content(content_id: str):
     return result
 
 @router.get("/contents", response_model=List[GeneratedContent])
-async def get_all_contents():
+async def get_all_contents(ids: Optional[List[str]] = Query(None)):
     """
     Récupère tous les contenus générés.
     
+    Args:
+        ids: Identifiants des contenus à retourner (tous si non fourni)
+        
     Returns:
         List[GeneratedContent]: Liste des contenus générés
     """
-    results = await generation_service.get_all_generated_contents()
+    results = await generation_service.get_all_generated_contents(ids=ids)
     return results
 
 @router.post("/linkedin", response_model=GeneratedContent)
@@ -114,6 +119,47 @@ async def generate_linkedin_post(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur de génération: {str(e)}")
 
+@router.post("/linkedin/batch", response_model=List[GeneratedContent])
+async def generate_linkedin_posts(
+    prompts: List[str],
+    tone: Optional[ContentTone] = None,
+    include_hashtags: bool = True,
+    include_emojis: bool = True,
+    language: str = "fr",
+    generation_repository: GenerationRepository = Depends(get_generation_repository)
+):
+    """
+    Génère plusieurs posts LinkedIn en une seule requête et les persiste en une seule transaction.
+    
+    Args:
+        prompts: Sujets ou descriptions des posts à générer
+        tone: Tonalité des posts
+        include_hashtags: Inclure des hashtags
+        include_emojis: Inclure des emojis
+        language: Langue du contenu
+        generation_repository: Repository de génération de la requête
+        
+    Returns:
+        List[GeneratedContent]: Les posts LinkedIn générés, dans l'ordre des prompts
+    """
+    parameters_list = [
+        GenerationParameters(
+            content_type=ContentType.LINKEDIN_POST,
+            prompt=prompt,
+            tone=tone,
+            include_hashtags=include_hashtags,
+            include_emojis=include_emojis,
+            language=language
+        )
+        for prompt in prompts
+    ]
+    
+    try:
+        results = await generation_service.generate_contents(parameters_list, repository=generation_repository)
+        return results
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur de génération: {str(e)}")
+
 @router.post("/twitter", response_model=GeneratedContent)
 async def generate_twitter_post(
     prompt: str,
@@ -68,45 +68,11 @@ class GenerationService:
             GeneratedContent: Le contenu généré
         """
         try:
-            # Génération avec OpenAI par défaut
-            if self.openai_client:
-                result = await self._generate_with_openai(parameters)
-            elif self.anthropic_client:
-                result = await self._generate_with_anthropic(parameters)
-            else:
-                # Fallback pour les tests si aucun client n'est disponible
-                result = await self._generate_mock_content(parameters)
-            
-            # Enregistrement du contenu généré
-            content_id = str(uuid.uuid4())
-            generated_content = GeneratedContent(
-                content_id=content_id,
-                content_type=parameters.content_type,
-                content=result["content"],
-                variants=result.get("variants"),
-                hashtags=result.get("hashtags"),
-                title=result.get("title"),
-                summary=result.get("summary"),
-                parameters=parameters,
-                created_at=datetime.now().isoformat(),
-                metadata=result.get("metadata")
-            )
-            
-            # Stockage du contenu généré dans le dictionnaire (pour compatibilité pendant la transition)
-            self._generated_contents[content_id] = generated_content
+            generated_content = await self._generate_one(parameters)
             
             # Stockage dans la base de données si le repository est disponible
             if self.repository:
-                from app.db.models.generation import GeneratedContent as DbGeneratedContent
-                db_content = DbGeneratedContent(
-                    id=content_id,
-                    content_type=parameters.content_type,
-                    content=result["content"],
-                    prompt=parameters.prompt,
-                    tone=parameters.tone if hasattr(parameters, 'tone') else None,
-                    model_used=result.get("metadata", {}).get("model") if result.get("metadata") else None
-                )
-                await self.repository.create(db_content)
+                await self.repository.create(self._to_db_model(generated_content))
             
             return generated_content
             
@@ -114,6 +80,97 @@ class GenerationService:
             logger.error(f"Erreur lors de la génération de contenu: {str(e)}")
             raise
 
+    async def generate_contents(
+        self,
+        parameters_list: List[GenerationParameters],
+        repository: Optional[Any] = None
+    ) -> List[GeneratedContent]:
+        """
+        Génère plusieurs contenus et les persiste en une seule transaction.
+        
+        Args:
+            parameters_list: Liste des paramètres de génération
+            repository: Repository à utiliser pour ce lot (par défaut celui du service ;
+                sans repository, les contenus ne sont conservés qu'en mémoire)
+            
+        Returns:
+            List[GeneratedContent]: Les contenus générés, dans l'ordre des paramètres
+        """
+        repository = repository or self.repository
+        try:
+            generated_contents = [await self._generate_one(parameters) for parameters in parameters_list]
+            
+            # Un seul commit pour tout le lot
+            if repository and generated_contents:
+                await repository.create_many([self._to_db_model(content) for content in generated_contents])
+            
+            return generated_contents
+            
+        except Exception as e:
+            logger.error(f"Erreur lors de la génération de contenus par lot: {str(e)}")
+            raise
+
+    async def _generate_one(self, parameters: GenerationParameters) -> GeneratedContent:
+        """
+        Génère un contenu et l'enregistre en mémoire (sans le persister en base).
+        
+        Args:
+            parameters: Paramètres de génération
+            
+        Returns:
+            GeneratedContent: Le contenu généré
+        """
+        # Génération avec OpenAI par défaut
+        if self.openai_client:
+            result = await self._generate_with_openai(parameters)
+        elif self.anthropic_client:
+            result = await self._generate_with_anthropic(parameters)
+        else:
+            # Fallback pour les tests si aucun client n'est disponible
+            result = await self._generate_mock_content(parameters)
+        
+        # Enregistrement du contenu généré
+        content_id = str(uuid.uuid4())
+        generated_content = GeneratedContent(
+            content_id=content_id,
+            content_type=parameters.content_type,
+            content=result["content"],
+            variants=result.get("variants"),
+            hashtags=result.get("hashtags"),
+            title=result.get("title"),
+            summary=result.get("summary"),
+            parameters=parameters,
+            created_at=datetime.now().isoformat(),
+            metadata=result.get("metadata")
+        )
+        
+        # Stockage du contenu généré dans le dictionnaire (pour compatibilité pendant la transition)
+        self._generated_contents[content_id] = generated_content
+        
+        return generated_content
+
+    @staticmethod
+    def _to_db_model(generated_content: GeneratedContent) -> Any:
+        """
+        Construit le modèle de base de données correspondant à un contenu généré.
+        
+        Args:
+            generated_content: Le contenu généré
+            
+        Returns:
+            Any: Le modèle de base de données à persister
+        """
+        from app.db.models.generation import GeneratedContent as DbGeneratedContent
+        parameters = generated_content.parameters
+        return DbGeneratedContent(
+            id=generated_content.content_id,
+            content_type=parameters.content_type,
+            content=generated_content.content,
+            prompt=parameters.prompt,
+            tone=parameters.tone if hasattr(parameters, 'tone') else None,
+            model_used=generated_content.metadata.get("model") if generated_content.metadata else None
+        )
+
     async def get_content_by_id(self, content_id: str) -> Optional[GeneratedContent]:
         """
         Récupère un contenu généré par son ID.
@@ -126,14 +183,20 @@ class GenerationService:
         """
         return self._generated_contents.get(content_id)
 
-    async def get_all_generated_contents(self) -> List[GeneratedContent]:
+    async def get_all_generated_contents(self, ids: Optional[List[str]] = None) -> List[GeneratedContent]:
         """
         Récupère tous les contenus générés.
         
+        Args:
+            ids: Identifiants des contenus à retourner (tous si None)
+            
         Returns:
             List[GeneratedContent]: Liste des contenus générés
         """
-        return list(self._generated_contents.values())
+        if ids is None:
+            return list(self._generated_contents.values())
+        # Recherche directe par clé plutôt que parcours de tous les contenus
+        return [self._generated_contents[content_id] for content_id in ids if content_id in self._generated_contents]
 
     async def _generate_with_openai(self, parameters: GenerationParameters) -> Dict[str, Any]:
         """
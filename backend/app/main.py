@@ -1,6 +1,7 @@
 # backend/app/main.py
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from .config import settings
 from .analysis.router import router as analysis_router
 from .analysis.router_db import router as analysis_db_router
@@ -13,6 +14,7 @@ from .profiling.router import router as profiling_router
 from .model_selector.router import router as model_selector_router
 from .websearch.router import router as websearch_router
 from .moderation.router import router as moderation_router
+from .moderation.service import moderation_service
 from .db.base import Base
 from .db.session import async_engine
 
@@ -45,9 +47,11 @@ async def lifespan(app_: FastAPI):
     
     # Shutdown events
     print(f"Shutting down {settings.app_name}...")
+    # Fermer les connexions HTTP maintenues ouvertes par les clients de modération
+    await moderation_service.aclose()
 
 
-app = FastAPI(title=settings.app_name, lifespan=lifespan)
+app = FastAPI(title=settings.app_name, lifespan=lifespan, default_response_class=ORJSONResponse)
 
 @app.get("/health", tags=["Health"])
 async def health_check():
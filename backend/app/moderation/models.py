@@ -1,7 +1,7 @@
 # backend/app/moderation/models.py
 from enum import Enum
 from typing import Dict, List, Optional, Union, Any
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 
 class ContentType(str, Enum):
@@ -41,6 +41,9 @@ class ModerationResult(BaseModel):
     content_type: ContentType = Field(description="Type de contenu modéré")
     original_response: Optional[Dict[str, Any]] = Field(None, description="Réponse brute du fournisseur")
     moderation_id: Optional[str] = Field(None, description="Identifiant unique du résultat de modération")
+    # Faux si une partie des fournisseurs interrogés n'a pas répondu (résultat dégradé, jamais mis en cache).
+    # Attribut privé : il n'apparaît pas dans les réponses de l'API.
+    _complete: bool = PrivateAttr(default=True)
 
 
 class ModerationRequest(BaseModel):
@@ -82,20 +82,18 @@ async def moderate_batch(contents: List[str],
     Returns:
         List[ModerationResult]: Les résultats de modération pour chaque texte
     """
-    results = []
-    
-    for content in contents:
-        try:
-            result = await moderation_service.moderate_content(
-                content=content,
-                moderation_type=moderation_type,
-                content_type=ContentType.TEXT,
-                include_original_response=include_original_response
-            )
-            results.append(result)
-        except Exception as e:
-            # En cas d'erreur, on ajoute un résultat d'erreur
-            error_result = ModerationResult(
+    try:
+        # Les textes sont envoyés aux fournisseurs par lots plutôt qu'un par un
+        return await moderation_service.moderate_batch(
+            contents,
+            moderation_type=moderation_type,
+            content_type=ContentType.TEXT,
+            include_original_response=include_original_response
+        )
+    except Exception as e:
+        # En cas d'erreur, on retourne un résultat d'erreur pour chaque texte
+        return [
+            ModerationResult(
                 flagged=True,
                 categories={},
                 category_scores={},
@@ -103,9 +101,8 @@ async def moderate_batch(contents: List[str],
                 content_type=ContentType.TEXT,
                 original_response={"error": str(e)} if include_original_response else None
             )
-            results.append(error_result)
-    
-    return results
+            for _ in contents
+        ]
 
 @router.post("/moderate/image", response_model=ModerationResult)
 async def moderate_image(content: str, 
@@ -1,13 +1,26 @@
 # backend/app/moderation/service.py
 import os
-from typing import Dict, List, Union, Any, Optional
+import asyncio
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import orjson
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, List, Union, Any, Optional, Tuple
 from dotenv import load_dotenv
 import logging
 from abc import ABC, abstractmethod
+import httpx
 
-# Importation des bibliothèques de modération
-from openai import OpenAI
-from anthropic import Anthropic
+# Importation des bibliothèques de modération (clients asynchrones : les appels ne bloquent pas la boucle d'événements)
+import openai
+import anthropic
+from openai import AsyncOpenAI
+from anthropic import AsyncAnthropic
 from detoxify import Detoxify
 
 from .models import ModerationResult, ContentType, ModerationType, ToxicityCategory
@@ -18,6 +31,113 @@ load_dotenv()
 # Configuration du logging
 logger = logging.getLogger(__name__)
 
+# Version des modèles de modération, incluse dans la clé du cache de résultats.
+# À incrémenter lors d'un changement de modèle pour invalider les résultats en cache.
+MODERATION_MODEL_VERSION = "1"
+
+# Extraction de l'objet JSON de la réponse de Claude, compilée une seule fois
+_JSON_OBJECT_RE = re.compile(r'{.*}', re.DOTALL)
+
+# Durée de validité d'un résultat en cache (24 h) : au-delà, le contenu est de nouveau soumis au fournisseur
+MODERATION_CACHE_TTL_SECONDS = 24 * 60 * 60
+
+# Limites du pool de connexions HTTP de chaque client d'API : les connexions
+# maintenues ouvertes sont réutilisées d'un appel à l'autre
+MODERATION_HTTP_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=16)
+
+# Débit maximal des appels à chaque API de modération (requêtes par seconde, rafale comprise)
+MODERATION_RATE_LIMIT = 50
+
+# Nouvelles tentatives sur erreur transitoire : attente exponentielle avec gigue, bornée
+RATE_LIMIT_MAX_ATTEMPTS = 3
+RATE_LIMIT_BASE_DELAY = 0.5
+RATE_LIMIT_MAX_DELAY = 8.0
+
+# Erreurs de connexion des SDK (délais d'attente dépassés compris)
+CONNECTION_ERRORS = (openai.APIConnectionError, anthropic.APIConnectionError)
+# Erreurs HTTP des SDK, réessayées selon leur statut
+API_STATUS_ERRORS = (openai.APIStatusError, anthropic.APIStatusError)
+# Statuts transitoires réessayés, en plus des erreurs 5xx (mêmes règles que les SDK)
+RETRYABLE_STATUS_CODES = frozenset({408, 409, 429})
+
+
+def _is_retryable(error: Exception) -> bool:
+    """
+    Indique si une erreur d'API est transitoire et mérite une nouvelle tentative.
+    
+    Args:
+        error: Exception levée par le SDK
+        
+    Returns:
+        bool: True pour les erreurs de connexion, 408, 409, 429 et 5xx
+    """
+    if isinstance(error, CONNECTION_ERRORS):
+        return True
+    if isinstance(error, API_STATUS_ERRORS):
+        return error.status_code in RETRYABLE_STATUS_CODES or error.status_code >= 500
+    return False
+
+
+class _TokenBucket:
+    """
+    Seau à jetons asynchrone : lisse les rafales d'appels à une API sous un débit donné.
+    Chaque appel réserve un jeton ; s'il n'y en a plus, il attend son tour sans verrou
+    (la réservation est faite sans point d'attente, donc de façon atomique dans la boucle d'événements).
+    """
+    
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Args:
+            rate: Nombre de jetons ajoutés par seconde
+            capacity: Nombre maximal de jetons disponibles d'un coup (par défaut, rate)
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+    
+    async def acquire(self) -> None:
+        """Attend qu'un jeton soit disponible et le consomme."""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+        self._tokens -= 1
+        if self._tokens < 0:
+            await asyncio.sleep(-self._tokens / self.rate)
+
+
+# Un seau par API, partagé par toutes les instances des fournisseurs
+_rate_limiters = {
+    "openai": _TokenBucket(MODERATION_RATE_LIMIT),
+    "anthropic": _TokenBucket(MODERATION_RATE_LIMIT)
+}
+
+
+async def _call_with_retry(api: str, create, **kwargs) -> Any:
+    """
+    Appelle une API de modération sous le limiteur de débit, en réessayant sur erreur transitoire
+    (connexion, 408, 409, 429 ou 5xx, voir _is_retryable).
+    
+    Args:
+        api: Nom de l'API ("openai" ou "anthropic"), qui désigne le seau à jetons
+        create: Méthode asynchrone du SDK à appeler
+        **kwargs: Arguments de la requête
+        
+    Returns:
+        Any: La réponse du SDK
+    """
+    for attempt in range(1, RATE_LIMIT_MAX_ATTEMPTS + 1):
+        await _rate_limiters[api].acquire()
+        try:
+            return await create(**kwargs)
+        except Exception as e:
+            if attempt == RATE_LIMIT_MAX_ATTEMPTS or not _is_retryable(e):
+                raise
+            delay = min(RATE_LIMIT_MAX_DELAY, RATE_LIMIT_BASE_DELAY * 2 ** (attempt - 1))
+            delay += random.uniform(0, RATE_LIMIT_BASE_DELAY)
+            logger.warning(f"Erreur transitoire de l'API {api} ({str(e)}), nouvelle tentative dans {delay:.2f}s")
+            await asyncio.sleep(delay)
+
 
 class ModerationProvider(ABC):
     """Interface abstraite pour les fournisseurs de modération."""
@@ -27,6 +147,21 @@ class ModerationProvider(ABC):
         """Modère le contenu fourni et retourne un résultat de modération."""
         pass
     
+    async def moderate_batch(self, texts: List[str], **kwargs) -> List[ModerationResult]:
+        """
+        Modère chaque texte séparément et retourne un résultat par texte, dans l'ordre.
+        Implémentation par défaut : un appel à moderate_content par texte, en parallèle.
+        Les fournisseurs disposant d'une API par lots la surchargent.
+        
+        Args:
+            texts: Liste de textes à modérer
+            **kwargs: Arguments supplémentaires pour la requête
+            
+        Returns:
+            List[ModerationResult]: Un résultat de modération par texte
+        """
+        return list(await asyncio.gather(*[self.moderate_content(text, **kwargs) for text in texts]))
+    
     @staticmethod
     def normalize_category(category: str) -> str:
         """Normalise les noms de catégories vers un format standardisé."""
@@ -53,6 +188,12 @@ class ModerationProvider(ABC):
         }
         
         return mapping.get(category.lower(), ToxicityCategory.OTHER)
+    
+    async def aclose(self) -> None:
+        """Ferme le client d'API du fournisseur (et son pool de connexions HTTP) s'il en possède un."""
+        client = getattr(self, "client", None)
+        if client is not None:
+            await client.close()
 
 
 class OpenAIModerationProvider(ModerationProvider):
@@ -63,7 +204,12 @@ class OpenAIModerationProvider(ModerationProvider):
         self.api_key = os.getenv("OPENAI_API_KEY")
         if not self.api_key:
             logger.warning("OPENAI_API_KEY n'est pas définie. La modération OpenAI ne fonctionnera pas.")
-        self.client = OpenAI(api_key=self.api_key) if self.api_key else None
+        # Les nouvelles tentatives (erreurs transitoires, 429 compris) sont gérées par _call_with_retry, pas par le SDK
+        self.client = AsyncOpenAI(
+            api_key=self.api_key,
+            max_retries=0,
+            http_client=openai.DefaultAsyncHttpxClient(limits=MODERATION_HTTP_LIMITS)
+        ) if self.api_key else None
     
     async def moderate_content(self, content: Union[str, List[str]], **kwargs) -> ModerationResult:
         """
@@ -87,35 +233,67 @@ class OpenAIModerationProvider(ModerationProvider):
         
         try:
             # Appel à l'API de modération OpenAI
-            response = self.client.moderations.create(input=content_list)
+            response = await _call_with_retry("openai", self.client.moderations.create, input=content_list)
             
             # Extraction des résultats (on prend le premier pour l'instant)
-            result = response.results[0]
-            
-            # Préparation des catégories et scores
-            categories = {}
-            category_scores = {}
-            
-            for category_name, flagged in result.categories.model_dump().items():
-                normalized_category = self.normalize_category(category_name)
-                categories[normalized_category] = flagged
-                category_scores[normalized_category] = result.category_scores.model_dump().get(category_name, 0.0)
-            
-            # Construction du résultat normalisé
-            moderation_result = ModerationResult(
-                flagged=result.flagged,
-                categories=categories,
-                category_scores=category_scores,
-                provider="openai",
-                content_type=ContentType.TEXT,
-                original_response=response.model_dump() if kwargs.get("include_original_response") else None
-            )
-            
-            return moderation_result
+            return self._to_moderation_result(response.results[0], response, **kwargs)
             
         except Exception as e:
             logger.error(f"Erreur lors de la modération OpenAI: {str(e)}")
             raise
+    
+    async def moderate_batch(self, texts: List[str], **kwargs) -> List[ModerationResult]:
+        """
+        Modère une liste de textes en un seul appel à l'API OpenAI, qui retourne un résultat par texte.
+        
+        Args:
+            texts: Liste de textes à modérer
+            **kwargs: Arguments supplémentaires pour la requête
+            
+        Returns:
+            List[ModerationResult]: Un résultat de modération par texte, dans l'ordre
+        """
+        if not self.client:
+            raise ValueError("Client OpenAI non initialisé. Vérifiez votre clé API.")
+        
+        try:
+            response = await _call_with_retry("openai", self.client.moderations.create, input=texts)
+            return [self._to_moderation_result(result, response, **kwargs) for result in response.results]
+        except Exception as e:
+            logger.error(f"Erreur lors de la modération OpenAI par lots: {str(e)}")
+            raise
+    
+    def _to_moderation_result(self, result: Any, response: Any, **kwargs) -> ModerationResult:
+        """
+        Convertit un résultat de l'API OpenAI en résultat de modération normalisé.
+        
+        Args:
+            result: Élément de response.results
+            response: Réponse complète de l'API (conservée si include_original_response)
+            **kwargs: Arguments supplémentaires pour la requête
+            
+        Returns:
+            ModerationResult: Résultat de l'analyse de modération
+        """
+        # Préparation des catégories et scores
+        categories = {}
+        category_scores = {}
+        raw_scores = result.category_scores.model_dump()
+        
+        for category_name, flagged in result.categories.model_dump().items():
+            normalized_category = self.normalize_category(category_name)
+            categories[normalized_category] = flagged
+            category_scores[normalized_category] = raw_scores.get(category_name, 0.0)
+        
+        # Construction du résultat normalisé
+        return ModerationResult(
+            flagged=result.flagged,
+            categories=categories,
+            category_scores=category_scores,
+            provider="openai",
+            content_type=ContentType.TEXT,
+            original_response=response.model_dump() if kwargs.get("include_original_response") else None
+        )
 
 
 class AnthropicModerationProvider(ModerationProvider):
@@ -126,7 +304,12 @@ class AnthropicModerationProvider(ModerationProvider):
         self.api_key = os.getenv("ANTHROPIC_API_KEY")
         if not self.api_key:
             logger.warning("ANTHROPIC_API_KEY n'est pas définie. La modération Anthropic ne fonctionnera pas.")
-        self.client = Anthropic(api_key=self.api_key) if self.api_key else None
+        # Les nouvelles tentatives (erreurs transitoires, 429 compris) sont gérées par _call_with_retry, pas par le SDK
+        self.client = AsyncAnthropic(
+            api_key=self.api_key,
+            max_retries=0,
+            http_client=anthropic.DefaultAsyncHttpxClient(limits=MODERATION_HTTP_LIMITS)
+        ) if self.api_key else None
     
     async def moderate_content(self, content: Union[str, List[str]], **kwargs) -> ModerationResult:
         """
@@ -189,7 +372,9 @@ class AnthropicModerationProvider(ModerationProvider):
         
         try:
             # Appel à l'API Anthropic
-            response = self.client.messages.create(
+            response = await _call_with_retry(
+                "anthropic",
+                self.client.messages.create,
                 model="claude-3-sonnet-20240229",
                 max_tokens=1000,
                 system="Tu es un système de modération de contenu qui analyse objectivement le texte pour détecter des contenus problématiques.",
@@ -198,18 +383,15 @@ class AnthropicModerationProvider(ModerationProvider):
                 ]
             )
             
-            # Extraction et analyse de la réponse JSON
-            import json
-            import re
-            
             # Extraction du JSON de la réponse
             response_text = response.content[0].text
-            json_match = re.search(r'{.*}', response_text, re.DOTALL)
+            json_match = _JSON_OBJECT_RE.search(response_text)
             
             if not json_match:
                 raise ValueError("Format de réponse Claude invalide")
             
-            analysis = json.loads(json_match.group(0))
+            # orjson (implémenté en C) décode plus vite que le module json standard
+            analysis = orjson.loads(json_match.group(0))
             
             # Construction du résultat normalisé
             moderation_result = ModerationResult(
@@ -242,6 +424,38 @@ class AnthropicModerationProvider(ModerationProvider):
             raise
 
 
+# Modèles Detoxify chargés, par type ; le verrou garantit un seul chargement même lorsque
+# plusieurs threads (asyncio.to_thread) demandent le même modèle à froid
+_DETOXIFY_MODELS: Dict[str, Detoxify] = {}
+_DETOXIFY_LOAD_LOCK = threading.Lock()
+
+
+def _load_detoxify_model(model_type: str) -> Detoxify:
+    """
+    Charge un modèle Detoxify une seule fois par type : toutes les instances
+    du fournisseur partagent les mêmes poids en mémoire.
+    
+    Args:
+        model_type: Type de modèle Detoxify ('original', 'unbiased', ou 'multilingual')
+        
+    Returns:
+        Detoxify: Le modèle chargé
+    """
+    # Chemin rapide sans verrou une fois le modèle chargé
+    model = _DETOXIFY_MODELS.get(model_type)
+    if model is not None:
+        return model
+    with _DETOXIFY_LOAD_LOCK:
+        # Revérifier sous le verrou : un autre thread a pu terminer le chargement entre-temps
+        model = _DETOXIFY_MODELS.get(model_type)
+        if model is None:
+            logger.info(f"Chargement du modèle Detoxify {model_type}...")
+            model = Detoxify(model_type=model_type)
+            _DETOXIFY_MODELS[model_type] = model
+            logger.info("Modèle Detoxify chargé avec succès")
+    return model
+
+
 class DetoxifyModerationProvider(ModerationProvider):
     """Fournisseur de modération utilisant le modèle local Detoxify."""
     
@@ -259,15 +473,25 @@ class DetoxifyModerationProvider(ModerationProvider):
     @property
     def model(self):
         """Charge le modèle Detoxify (lazy loading pour économiser la mémoire)."""
-        if DetoxifyModerationProvider._model_instance is None:
+        if self._model_instance is None:
             try:
-                logger.info(f"Chargement du modèle Detoxify {self.model_type}...")
-                DetoxifyModerationProvider._model_instance = Detoxify(model_type=self.model_type)
-                logger.info("Modèle Detoxify chargé avec succès")
+                self._model_instance = _load_detoxify_model(self.model_type)
             except Exception as e:
                 logger.error(f"Erreur lors du chargement du modèle Detoxify: {str(e)}")
                 raise
-        return DetoxifyModerationProvider._model_instance
+        return self._model_instance
+    
+    def _predict(self, text: Union[str, List[str]]) -> Dict[str, Any]:
+        """
+        Charge le modèle si besoin et calcule les scores (appel bloquant, exécuté dans un thread).
+        
+        Args:
+            text: Texte ou liste de textes à analyser
+            
+        Returns:
+            Dict[str, Any]: Scores par catégorie Detoxify
+        """
+        return self.model.predict(text)
     
     async def moderate_content(self, content: Union[str, List[str]], **kwargs) -> ModerationResult:
         """
@@ -290,44 +514,93 @@ class DetoxifyModerationProvider(ModerationProvider):
         combined_text = "\n".join(content_list)
         
         try:
-            # Analyse avec Detoxify
-            results = self.model.predict(combined_text)
-            
-            # Définition d'un seuil de détection (ajustable)
-            threshold = kwargs.get("threshold", 0.5)
+            # Analyse avec Detoxify dans un thread : l'inférence ne bloque pas la boucle d'événements
+            results = await asyncio.to_thread(self._predict, combined_text)
+            return self._to_moderation_result(results, **kwargs)
             
-            # Préparation des catégories et scores
-            categories = {}
-            category_scores = {}
-            flagged = False
-            
-            for category, score in results.items():
-                normalized_category = self.normalize_category(category)
-                # Convertir le score numpy en float Python
-                score_value = float(score)
-                category_scores[normalized_category] = score_value
-                is_flagged = score_value >= threshold
-                categories[normalized_category] = is_flagged
-                
-                # Si au moins une catégorie dépasse le seuil, le contenu est signalé
-                if is_flagged:
-                    flagged = True
+        except Exception as e:
+            logger.error(f"Erreur lors de la modération Detoxify: {str(e)}")
+            raise
+    
+    async def moderate_batch(self, texts: List[str], **kwargs) -> List[ModerationResult]:
+        """
+        Modère une liste de textes en une seule passe du modèle Detoxify.
+        
+        Args:
+            texts: Liste de textes à modérer
+            **kwargs: Arguments supplémentaires pour la requête
             
-            # Construction du résultat normalisé
-            moderation_result = ModerationResult(
-                flagged=flagged,
-                categories=categories,
-                category_scores=category_scores,
-                provider="detoxify",
-                content_type=ContentType.TEXT,
-                original_response=results if kwargs.get("include_original_response") else None
-            )
+        Returns:
+            List[ModerationResult]: Un résultat de modération par texte, dans l'ordre
+        """
+        try:
+            # Sur une liste, predict retourne une liste de scores par catégorie
+            results = await asyncio.to_thread(self._predict, texts)
+            threshold = kwargs.get("threshold", 0.5)
+            include_original_response = kwargs.get("include_original_response")
             
-            return moderation_result
+            # Matrice (textes x catégories) des scores : le seuillage est fait en une seule opération
+            detoxify_categories = list(results.keys())
+            scores = np.stack([np.asarray(results[category], dtype=np.float64) for category in detoxify_categories], axis=1)
+            flagged_matrix = scores >= threshold
+            flagged_rows = flagged_matrix.any(axis=1).tolist()
+            normalized_categories = [self.normalize_category(category) for category in detoxify_categories]
             
+            return [
+                ModerationResult(
+                    flagged=flagged,
+                    categories=dict(zip(normalized_categories, row_flags)),
+                    category_scores=dict(zip(normalized_categories, row_scores)),
+                    provider="detoxify",
+                    content_type=ContentType.TEXT,
+                    original_response=dict(zip(detoxify_categories, row_scores)) if include_original_response else None
+                )
+                for flagged, row_flags, row_scores in zip(flagged_rows, flagged_matrix.tolist(), scores.tolist())
+            ]
         except Exception as e:
-            logger.error(f"Erreur lors de la modération Detoxify: {str(e)}")
+            logger.error(f"Erreur lors de la modération Detoxify par lots: {str(e)}")
             raise
+    
+    def _to_moderation_result(self, results: Dict[str, Any], **kwargs) -> ModerationResult:
+        """
+        Convertit les scores Detoxify d'un texte en résultat de modération normalisé.
+        
+        Args:
+            results: Scores par catégorie Detoxify
+            **kwargs: Arguments supplémentaires pour la requête
+            
+        Returns:
+            ModerationResult: Résultat de l'analyse de modération
+        """
+        # Définition d'un seuil de détection (ajustable)
+        threshold = kwargs.get("threshold", 0.5)
+        
+        # Préparation des catégories et scores
+        categories = {}
+        category_scores = {}
+        flagged = False
+        
+        for category, score in results.items():
+            normalized_category = self.normalize_category(category)
+            # Convertir le score numpy en float Python
+            score_value = float(score)
+            category_scores[normalized_category] = score_value
+            is_flagged = score_value >= threshold
+            categories[normalized_category] = is_flagged
+            
+            # Si au moins une catégorie dépasse le seuil, le contenu est signalé
+            if is_flagged:
+                flagged = True
+        
+        # Construction du résultat normalisé
+        return ModerationResult(
+            flagged=flagged,
+            categories=categories,
+            category_scores=category_scores,
+            provider="detoxify",
+            content_type=ContentType.TEXT,
+            original_response=results if kwargs.get("include_original_response") else None
+        )
 
 
 class CombinedModerationProvider(ModerationProvider):
@@ -341,6 +614,10 @@ class CombinedModerationProvider(ModerationProvider):
             "detoxify": DetoxifyModerationProvider()
         }
     
+    async def aclose(self) -> None:
+        """Libère les ressources de tous les fournisseurs combinés."""
+        await asyncio.gather(*[provider.aclose() for provider in self.providers.values()])
+    
     async def moderate_content(self, content: Union[str, List[str]], **kwargs) -> ModerationResult:
         """
         Modère le contenu en utilisant plusieurs fournisseurs et combine les résultats.
@@ -352,6 +629,44 @@ class CombinedModerationProvider(ModerationProvider):
         Returns:
             ModerationResult: Résultat combiné de l'analyse de modération
         """
+        results, complete = await self._gather_provider_results(
+            lambda provider: provider.moderate_content(content, **kwargs), **kwargs
+        )
+        return self._combine_results(results, complete=complete, **kwargs)
+    
+    async def moderate_batch(self, texts: List[str], **kwargs) -> List[ModerationResult]:
+        """
+        Modère une liste de textes avec l'appel par lots de chaque fournisseur, puis combine
+        les résultats texte par texte.
+        
+        Args:
+            texts: Liste de textes à modérer
+            **kwargs: Arguments supplémentaires pour la requête
+            
+        Returns:
+            List[ModerationResult]: Un résultat combiné par texte, dans l'ordre
+        """
+        batch_results, complete = await self._gather_provider_results(
+            lambda provider: provider.moderate_batch(texts, **kwargs), **kwargs
+        )
+        return [
+            self._combine_results(
+                {provider_name: results[i] for provider_name, results in batch_results.items()},
+                complete=complete, **kwargs
+            )
+            for i in range(len(texts))
+        ]
+    
+    def _available_providers(self, **kwargs) -> List[str]:
+        """
+        Sélectionne les fournisseurs demandés dont le client est initialisé.
+        
+        Args:
+            **kwargs: Arguments de la requête (clé "providers" optionnelle)
+            
+        Returns:
+            List[str]: Noms des fournisseurs à interroger (Detoxify à défaut)
+        """
         # Sélection des fournisseurs à utiliser
         providers_to_use = kwargs.get("providers", ["openai", "detoxify"])
         
@@ -374,20 +689,59 @@ class CombinedModerationProvider(ModerationProvider):
             logger.warning("Aucun fournisseur cloud disponible, utilisation de Detoxify uniquement")
             available_providers = ["detoxify"]
         
-        # Résultats de chaque fournisseur
-        results = {}
+        return available_providers
+    
+    async def _gather_provider_results(self, call, **kwargs) -> Tuple[Dict[str, Any], bool]:
+        """
+        Applique l'appel à chaque fournisseur disponible, en parallèle.
         
-        # Obtention des résultats de chaque fournisseur
-        for provider_name in available_providers:
-            try:
-                provider = self.providers[provider_name]
-                results[provider_name] = await provider.moderate_content(content, **kwargs)
-            except Exception as e:
-                logger.error(f"Erreur avec le fournisseur {provider_name}: {str(e)}")
+        Args:
+            call: Fonction recevant un fournisseur et retournant la coroutine à attendre
+            **kwargs: Arguments de la requête (sélection des fournisseurs)
+            
+        Returns:
+            Tuple[Dict[str, Any], bool]: Résultat de chaque fournisseur ayant répondu, par nom, et
+            True si tous les fournisseurs interrogés ont répondu (False si certains ont échoué).
+            Un fournisseur sans client initialisé n'est pas interrogé : son absence ne rend pas le résultat incomplet.
+            
+        Raises:
+            ValueError: Si aucun fournisseur n'a répondu
+        """
+        available_providers = self._available_providers(**kwargs)
+        
+        # Interrogation de tous les fournisseurs en parallèle : la latence totale
+        # est celle du fournisseur le plus lent plutôt que la somme des appels
+        provider_results = await asyncio.gather(
+            *[call(self.providers[provider_name]) for provider_name in available_providers],
+            return_exceptions=True
+        )
+        
+        # Résultats de chaque fournisseur (les fournisseurs en erreur sont ignorés)
+        results = {}
+        for provider_name, provider_result in zip(available_providers, provider_results):
+            if isinstance(provider_result, Exception):
+                logger.error(f"Erreur avec le fournisseur {provider_name}: {str(provider_result)}")
+            else:
+                results[provider_name] = provider_result
         
         if not results:
             raise ValueError("Aucun résultat de modération disponible")
         
+        return results, len(results) == len(available_providers)
+    
+    @staticmethod
+    def _combine_results(results: Dict[str, ModerationResult], complete: bool = True, **kwargs) -> ModerationResult:
+        """
+        Combine les résultats de plusieurs fournisseurs pour un même contenu.
+        
+        Args:
+            results: Résultat de chaque fournisseur, par nom
+            complete: Faux si certains fournisseurs interrogés n'ont pas répondu
+            **kwargs: Arguments supplémentaires pour la requête
+            
+        Returns:
+            ModerationResult: Résultat combiné de l'analyse de modération
+        """
         # Initialisation des catégories combinées
         all_categories = set()
         for result in results.values():
@@ -420,6 +774,7 @@ class CombinedModerationProvider(ModerationProvider):
             original_response={provider: result.original_response for provider, result in results.items()} 
                 if kwargs.get("include_original_response") else None
         )
+        combined_result._complete = complete
         
         return combined_result
 
@@ -427,8 +782,14 @@ class CombinedModerationProvider(ModerationProvider):
 class ModerationService:
     """Service principal de modération de contenu."""
     
-    def __init__(self):
-        """Initialise les différents fournisseurs de modération."""
+    def __init__(self, max_batch_size: int = 100):
+        """
+        Initialise les différents fournisseurs de modération.
+        
+        Args:
+            max_batch_size: Nombre maximal de textes envoyés en un seul appel par moderate_batch
+        """
+        self.max_batch_size = max_batch_size
         self.providers = {
             ModerationType.OPENAI: OpenAIModerationProvider(),
             ModerationType.ANTHROPIC: AnthropicModerationProvider(),
@@ -439,6 +800,11 @@ class ModerationService:
         self.repository = None
         # Stockage des résultats de modération (pour compatibilité pendant la transition)
         self._moderation_results = {}
+        # Cache LRU des résultats des fournisseurs, indexé par empreinte du contenu.
+        # Chaque entrée conserve son instant d'expiration (horloge monotone) et le résultat.
+        self._result_cache: "OrderedDict[Tuple[Any, ...], Tuple[float, ModerationResult]]" = OrderedDict()
+        self._result_cache_maxsize = 4096
+        self._result_cache_ttl = MODERATION_CACHE_TTL_SECONDS
     
     def set_repository(self, repository):
         """
@@ -449,6 +815,38 @@ class ModerationService:
         """
         self.repository = repository
     
+    async def aclose(self) -> None:
+        """Ferme les clients HTTP de tous les fournisseurs (à appeler à l'arrêt de l'application)."""
+        await asyncio.gather(*[provider.aclose() for provider in self.providers.values()])
+    
+    async def __aenter__(self) -> "ModerationService":
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aclose()
+    
+    @staticmethod
+    def _cache_key(content: Union[str, List[str]], moderation_type: ModerationType,
+                   kwargs: Dict[str, Any]) -> Tuple[Any, ...]:
+        """
+        Construit la clé du cache de résultats.
+        
+        Args:
+            content: Contenu à modérer
+            moderation_type: Type de modération
+            kwargs: Arguments supplémentaires transmis au fournisseur
+            
+        Returns:
+            Tuple[Any, ...]: Clé composée de l'empreinte BLAKE2b du contenu, du type de modération,
+            de la version des modèles et des options du fournisseur
+        """
+        content_str = content if isinstance(content, str) else json.dumps(content)
+        # BLAKE2b (bibliothèque standard) est plus rapide que SHA-256 ; l'empreinte brute
+        # de 16 octets suffit comme clé et évite la conversion hexadécimale
+        content_hash = hashlib.blake2b(content_str.encode("utf-8"), digest_size=16).digest()
+        options = tuple(sorted((key, repr(value)) for key, value in kwargs.items()))
+        return (content_hash, moderation_type, MODERATION_MODEL_VERSION, options)
+    
     async def moderate_content(self, content: Union[str, List[str]], 
                            moderation_type: ModerationType = ModerationType.COMBINED,
                            content_type: ContentType = ContentType.TEXT,
@@ -469,43 +867,22 @@ class ModerationService:
         # le même mécanisme de modération basé sur le texte pour tous les types de contenus.
         # Cela permet de tester les fonctionnalités sans avoir à implémenter des modèles spécifiques.
         import uuid
-        import json
         
         # Vérification que le fournisseur est disponible
         if moderation_type not in self.providers:
             raise ValueError(f"Type de modération {moderation_type} non supporté")
         
         try:
-            # Modération du contenu
-            provider = self.providers[moderation_type]
-            result = await provider.moderate_content(content, **kwargs)
+            # Modération du contenu (un contenu identique déjà modéré est servi depuis le cache)
+            cache_key = self._cache_key(content, moderation_type, kwargs)
+            result = self._get_cached_result(cache_key)
+            if result is None:
+                provider = self.providers[moderation_type]
+                result = await provider.moderate_content(content, **kwargs)
+                self._cache_result(cache_key, result)
             
             # Stockage du résultat dans le dictionnaire et la base de données
-            moderation_id = str(uuid.uuid4())
-            self._moderation_results[moderation_id] = result
-            
-            # Stockage dans la base de données si le repository est disponible
-            if self.repository:
-                try:
-                    from app.db.models.moderation import ModerationResult as DbModerationResult
-                    content_str = content if isinstance(content, str) else json.dumps(content)
-                    db_moderation = DbModerationResult(
-                        id=moderation_id,
-                        content=content_str,
-                        moderation_type=moderation_type,
-                        flagged=result.flagged,
-                        categories=result.categories,
-                        category_scores=result.category_scores,
-                        provider=result.provider
-                    )
-                    await self.repository.create(db_moderation)
-                    logger.info(f"Modération {moderation_id} sauvegardée en base de données")
-                except Exception as e:
-                    logger.error(f"Erreur lors de la sauvegarde en base de données: {str(e)}")
-                    # Ne pas faire échouer la modération si la base de données échoue
-            
-            # Ajout de l'identifiant à la réponse
-            result.moderation_id = moderation_id
+            await self._store_result(content, moderation_type, result)
             
             return result
         except Exception as e:
@@ -562,6 +939,137 @@ class ModerationService:
             
             return mock_result
     
+    async def moderate_batch(self, texts: List[str],
+                             moderation_type: ModerationType = ModerationType.COMBINED,
+                             content_type: ContentType = ContentType.TEXT,
+                             **kwargs) -> List[ModerationResult]:
+        """
+        Modère une liste de textes et retourne un résultat par texte.
+        Les textes absents du cache sont envoyés au fournisseur par lots d'au plus
+        max_batch_size textes (un seul appel d'API par lot quand le fournisseur le permet).
+        
+        Args:
+            texts: Liste de textes à modérer
+            moderation_type: Type de modération à effectuer
+            content_type: Type du contenu à modérer
+            **kwargs: Arguments supplémentaires pour la requête
+            
+        Returns:
+            List[ModerationResult]: Les résultats de modération, dans l'ordre des textes
+        """
+        if moderation_type not in self.providers:
+            raise ValueError(f"Type de modération {moderation_type} non supporté")
+        
+        # Les textes déjà modérés sont servis depuis le cache
+        cache_keys = [self._cache_key(text, moderation_type, kwargs) for text in texts]
+        results: List[Optional[ModerationResult]] = [self._get_cached_result(key) for key in cache_keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+        
+        async def moderate_chunk(indices: List[int]) -> None:
+            try:
+                chunk_results = await self.providers[moderation_type].moderate_batch(
+                    [texts[i] for i in indices], **kwargs
+                )
+            except Exception as e:
+                logger.error(f"Erreur lors de la modération par lots avec {moderation_type}: {str(e)}")
+                # Repli texte par texte : moderate_content fournit un résultat par défaut en cas d'erreur
+                for i in indices:
+                    results[i] = await self.moderate_content(texts[i], moderation_type, content_type, **kwargs)
+                return
+            for i, result in zip(indices, chunk_results):
+                self._cache_result(cache_keys[i], result)
+                results[i] = result
+        
+        await asyncio.gather(*[
+            moderate_chunk(missing[start:start + self.max_batch_size])
+            for start in range(0, len(missing), self.max_batch_size)
+        ])
+        
+        # Stockage des résultats (ceux du repli texte par texte ont déjà leur identifiant)
+        for text, result in zip(texts, results):
+            if result.moderation_id is None:
+                await self._store_result(text, moderation_type, result)
+        
+        return results
+    
+    def _get_cached_result(self, cache_key: Tuple[Any, ...]) -> Optional[ModerationResult]:
+        """
+        Retourne une copie du résultat en cache pour cette clé, ou None (absent ou expiré).
+        
+        Args:
+            cache_key: Clé construite par _cache_key
+            
+        Returns:
+            Optional[ModerationResult]: Copie indépendante du résultat en cache
+        """
+        entry = self._result_cache.get(cache_key)
+        if entry is None:
+            return None
+        expires_at, cached_result = entry
+        if time.monotonic() >= expires_at:
+            del self._result_cache[cache_key]
+            return None
+        self._result_cache.move_to_end(cache_key)
+        return cached_result.model_copy(deep=True)
+    
+    def _cache_result(self, cache_key: Tuple[Any, ...], result: ModerationResult) -> None:
+        """
+        Ajoute une copie du résultat au cache LRU, en évinçant l'entrée la plus ancienne si besoin.
+        Un résultat dégradé (fournisseurs combinés partiellement en erreur) n'est pas mis en cache :
+        le contenu sera de nouveau soumis à tous les fournisseurs au prochain appel.
+        
+        Args:
+            cache_key: Clé construite par _cache_key
+            result: Résultat retourné par le fournisseur
+        """
+        if not result._complete:
+            return
+        self._result_cache[cache_key] = (time.monotonic() + self._result_cache_ttl, result.model_copy(deep=True))
+        if len(self._result_cache) > self._result_cache_maxsize:
+            self._result_cache.popitem(last=False)
+    
+    def clear_cache(self) -> None:
+        """Vide le cache des résultats de modération (changement de configuration, isolation des tests)."""
+        self._result_cache.clear()
+    
+    async def _store_result(self, content: Union[str, List[str]], moderation_type: ModerationType,
+                            result: ModerationResult) -> None:
+        """
+        Attribue un identifiant au résultat et le conserve en mémoire et en base de données.
+        
+        Args:
+            content: Contenu modéré
+            moderation_type: Type de modération effectuée
+            result: Résultat de modération (son moderation_id est renseigné)
+        """
+        import uuid
+        
+        moderation_id = str(uuid.uuid4())
+        self._moderation_results[moderation_id] = result
+        
+        # Stockage dans la base de données si le repository est disponible
+        if self.repository:
+            try:
+                from app.db.models.moderation import ModerationResult as DbModerationResult
+                content_str = content if isinstance(content, str) else json.dumps(content)
+                db_moderation = DbModerationResult(
+                    id=moderation_id,
+                    content=content_str,
+                    moderation_type=moderation_type,
+                    flagged=result.flagged,
+                    categories=result.categories,
+                    category_scores=result.category_scores,
+                    provider=result.provider
+                )
+                await self.repository.create(db_moderation)
+                logger.info(f"Modération {moderation_id} sauvegardée en base de données")
+            except Exception as e:
+                logger.error(f"Erreur lors de la sauvegarde en base de données: {str(e)}")
+                # Ne pas faire échouer la modération si la base de données échoue
+        
+        # Ajout de l'identifiant à la réponse
+        result.moderation_id = moderation_id
+    
     async def get_moderation_by_id(self, moderation_id: str) -> Optional[ModerationResult]:
         """
         Récupère un résultat de modération par son ID.
@@ -1,7 +1,7 @@
 # backend/app/moderation/test_moderation.py
 import unittest
 import asyncio
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 import os
 
 from .models import ModerationResult, ContentType, ModerationType, ToxicityCategory
@@ -42,7 +42,7 @@ class TestModeration(unittest.TestCase):
         else:
             os.environ.pop("ANTHROPIC_API_KEY", None)
     
-    @patch("openai.OpenAI")
+    @patch("app.moderation.service.AsyncOpenAI")
     def test_openai_moderation(self, mock_openai):
         """Test de la modération via OpenAI."""
         # Configuration du mock
@@ -70,7 +70,7 @@ class TestModeration(unittest.TestCase):
         }
         mock_moderation_response.results = [mock_result]
         mock_moderation_response.model_dump.return_value = {"test": "response"}
-        mock_client.moderations.create.return_value = mock_moderation_response
+        mock_client.moderations.create = AsyncMock(return_value=mock_moderation_response)
         
         # Créer un fournisseur OpenAI avec le mock
         provider = OpenAIModerationProvider()
@@ -80,14 +80,14 @@ class TestModeration(unittest.TestCase):
         result = asyncio.run(provider.moderate_content("test content", include_original_response=True))
         
         # Vérifier les appels et le résultat
-        mock_client.moderations.create.assert_called_once_with(input=["test content"])
+        mock_client.moderations.create.assert_awaited_once_with(input=["test content"])
         self.assertTrue(result.flagged)
         self.assertTrue(result.categories[ToxicityCategory.SEXUAL])
         self.assertFalse(result.categories[ToxicityCategory.HATE])
         self.assertEqual(result.category_scores[ToxicityCategory.SEXUAL], 0.8)
         self.assertEqual(result.provider, "openai")
     
-    @patch("anthropic.Anthropic")
+    @patch("app.moderation.service.AsyncAnthropic")
     def test_anthropic_moderation(self, mock_anthropic):
         """Test de la modération via Anthropic."""
         # Configuration du mock
@@ -120,7 +120,7 @@ class TestModeration(unittest.TestCase):
         """
         mock_message.content = [mock_content]
         mock_message.model_dump.return_value = {"test": "response"}
-        mock_client.messages.create.return_value = mock_message
+        mock_client.messages.create = AsyncMock(return_value=mock_message)
         
         # Créer un fournisseur Anthropic avec le mock
         provider = AnthropicModerationProvider()
@@ -130,7 +130,7 @@ class TestModeration(unittest.TestCase):
         result = asyncio.run(provider.moderate_content("test content", include_original_response=True))
         
         # Vérifier les appels et le résultat
-        self.assertTrue(mock_client.messages.create.called)
+        mock_client.messages.create.assert_awaited_once()
         self.assertTrue(result.flagged)
         self.assertFalse(result.categories[ToxicityCategory.HATE])
         self.assertTrue(result.categories[ToxicityCategory.HARASSMENT])
@@ -96,14 +96,17 @@ async def get_content_publications(content_id: str):
     return results
 
 @router.get("/publications", response_model=List[PublicationResult])
-async def get_all_publications():
+async def get_all_publications(ids: Optional[List[str]] = Query(None)):
     """
     Récupère toutes les publications.
     
+    Args:
+        ids: Identifiants des publications à retourner (toutes si non fourni)
+        
     Returns:
         List[PublicationResult]: Liste de toutes les publications
     """
-    results = await publication_service.get_all_publications()
+    results = await publication_service.get_all_publications(ids=ids)
     return results
 
 @router.post("/linkedin", response_model=PublicationResult)
@@ -313,14 +313,20 @@ class PublicationService:
         
         return memory_results
 
-    async def get_all_publications(self) -> List[PublicationResult]:
+    async def get_all_publications(self, ids: Optional[List[str]] = None) -> List[PublicationResult]:
         """
         Récupère toutes les publications.
         
+        Args:
+            ids: Identifiants des publications à retourner (toutes si None)
+            
         Returns:
             List[PublicationResult]: Liste de toutes les publications
         """
-        return list(self._publication_results.values())
+        if ids is None:
+            return list(self._publication_results.values())
+        # Recherche directe par clé plutôt que parcours de toutes les publications
+        return [self._publication_results[pub_id] for pub_id in ids if pub_id in self._publication_results]
 
     def _check_platform_availability(self, platform: SocialMediaPlatform) -> bool:
         """
@@ -1,20 +1,78 @@
 # backend/tests/conftest.py
 import os
 import pytest
-import asyncio
+import pytest_asyncio
+import itertools
+import secrets
+from contextlib import asynccontextmanager
 from unittest.mock import AsyncMock, MagicMock, patch
 import sys
+import orjson
+from pytest_asyncio import is_async_test
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
 
 # Assurez-vous que le répertoire parent est ajouté au chemin Python pour permettre l'importation des modules
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-# Configuration pour les tests asynchrones
-@pytest.fixture(scope="session")
-def event_loop():
-    """Créer une boucle d'événements pour les tests asyncio."""
-    loop = asyncio.get_event_loop_policy().new_event_loop()
-    yield loop
-    loop.close()
+# URL de la base de données SQLite en mémoire partagée par toute la session de tests
+TEST_DB_URL = "sqlite+aiosqlite:///:memory:"
+
+
+# Identifiant bien formé qui n'existe jamais en base (tests 404)
+NONEXISTENT_UUID = "00000000-0000-4000-8000-000000000000"
+
+# Identifiants uniques sur la durée d'une exécution : un sel aléatoire par session + un compteur
+_uid_salt = secrets.token_hex(4)
+_uid_counter = itertools.count()
+
+
+def next_uid():
+    """Retourner un identifiant court, unique pour la session de tests."""
+    return f"{_uid_salt}-{next(_uid_counter):x}"
+
+
+@pytest.fixture
+def uid():
+    """Fournir un identifiant court et unique au test."""
+    return next_uid()
+
+
+def rjson(response):
+    """Décoder le corps JSON d'une réponse avec orjson (plus rapide que response.json())."""
+    return orjson.loads(response.content)
+
+
+def pytest_addoption(parser):
+    """Ajouter l'option permettant d'exécuter les tests sur la base de données SQLite sur disque."""
+    parser.addoption(
+        "--on-disk-db",
+        action="store_true",
+        default=False,
+        help=(
+            "Exécuter les tests sur la base SQLite configurée (settings.database_url) au lieu de la base "
+            "en mémoire, et activer les tests marqués on_disk_db qui l'inspectent directement"
+        ),
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    """
+    Exécuter tous les tests asynchrones dans la boucle d'événements de la session (une seule boucle
+    par worker, partagée avec les fixtures asynchrones de session), et ignorer les tests on_disk_db
+    sauf si l'option --on-disk-db est fournie.
+    """
+    session_loop = pytest.mark.asyncio(scope="session")
+    for item in items:
+        if is_async_test(item):
+            item.add_marker(session_loop, append=False)
+
+    if config.getoption("--on-disk-db"):
+        return
+    skip_on_disk = pytest.mark.skip(reason="nécessite l'option --on-disk-db")
+    for item in items:
+        if "on_disk_db" in item.keywords:
+            item.add_marker(skip_on_disk)
 
 # Fixture pour simuler les variables d'environnement pendant les tests
 @pytest.fixture(scope="function", autouse=True)
@@ -38,3 +96,94 @@ def mock_external_apis():
          patch("requests.post"), \
          patch("requests.get"):
         yield
+
+# Isolation du cache de résultats du service de modération partagé
+@pytest.fixture(scope="function", autouse=True)
+def clear_moderation_cache():
+    """
+    Vider le cache de résultats du service de modération avant chaque test : un résultat mis en
+    cache par un test (éventuellement simulé) ne doit pas être servi au suivant. Le module n'est
+    pas importé ici s'il ne l'a pas encore été (cache encore vide).
+    """
+    service_module = sys.modules.get("app.moderation.service")
+    if service_module is not None:
+        service_module.moderation_service.clear_cache()
+    yield
+
+@pytest.fixture(scope="session")
+def on_disk_db(request):
+    """Indiquer si les tests s'exécutent sur la base SQLite configurée (option --on-disk-db)."""
+    return request.config.getoption("--on-disk-db")
+
+# Client de test partagé par toute la session
+@pytest.fixture(scope="session")
+def client(on_disk_db, test_db_session_factory):
+    """
+    Fournir un TestClient unique pour la session (un par worker avec pytest-xdist).
+    Le schéma OpenAPI est généré une fois ici, ce qui force l'analyse de toutes les routes
+    avant le premier test plutôt que pendant celui-ci. Par défaut, le lifespan de l'application
+    est remplacé par un lifespan vide : les tables sont déjà créées dans la base en mémoire
+    par test_db_session_factory, inutile d'ouvrir la base sur disque au démarrage.
+    Avec --on-disk-db, le lifespan réel crée les tables dans la base configurée.
+    """
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    @asynccontextmanager
+    async def no_lifespan(app_):
+        yield
+
+    app.openapi()
+    original_lifespan = app.router.lifespan_context
+    if not on_disk_db:
+        app.router.lifespan_context = no_lifespan
+    try:
+        with TestClient(app) as test_client:
+            yield test_client
+    finally:
+        app.router.lifespan_context = original_lifespan
+
+# Base de données en mémoire pour les tests E2E (aucun fsync sur disque)
+@pytest_asyncio.fixture(scope="session")
+async def test_db_session_factory(on_disk_db):
+    """
+    Remplacer la session de base de données de l'application par une base SQLite en mémoire.
+    StaticPool garantit que toutes les sessions partagent la même connexion, donc les mêmes tables.
+    Avec --on-disk-db, l'application garde sa propre base (aucun remplacement, retourne None).
+    Requise par le client partagé ; les modules qui construisent leur propre client ASGI la
+    demandent explicitement (les modules de tests unitaires n'importent ainsi pas l'application).
+    """
+    if on_disk_db:
+        yield None
+        return
+
+    from app.main import app
+    from app.db.base import Base
+    from app.db import all_models  # noqa: F401 - enregistre tous les modèles dans Base.metadata
+    from app.db import dependencies, session
+
+    engine = create_async_engine(
+        TEST_DB_URL,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    test_async_session = async_sessionmaker(
+        bind=engine, class_=AsyncSession, expire_on_commit=False
+    )
+
+    async def override_get_db_session():
+        async with test_async_session() as db_session:
+            yield db_session
+
+    app.dependency_overrides[session.get_db_session] = override_get_db_session
+    app.dependency_overrides[dependencies.get_db_session] = override_get_db_session
+
+    yield test_async_session
+
+    app.dependency_overrides.pop(session.get_db_session, None)
+    app.dependency_overrides.pop(dependencies.get_db_session, None)
+    await engine.dispose()
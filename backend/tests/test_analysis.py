@@ -1,17 +1,13 @@
 # backend/tests/test_analysis.py
-from fastapi.testclient import TestClient
-from app.main import app
 import json
 
-client = TestClient(app)
-
-def test_analysis_status():
+def test_analysis_status(client):
     """Test que l'endpoint de statut d'analyse fonctionne correctement."""
     response = client.get("/analysis/")
     assert response.status_code == 200
     assert response.json() == {"module": "analysis", "status": "ok"}
 
-def test_perform_analysis():
+def test_perform_analysis(client):
     """Test que l'analyse de données fonctionne correctement."""
     # Données de test
     test_data = {
@@ -39,7 +35,7 @@ def test_perform_analysis():
     assert 0 <= metrics["maintainability_index"] <= 100
     assert metrics["bugs_estimate"] > 0
 
-def test_get_analysis_results():
+def test_get_analysis_results(client):
     """Test la récupération des résultats d'analyse."""
     # Créer une analyse
     test_data = {"code_size": 150}
@@ -1,14 +1,10 @@
 # backend/tests/test_campaign_analysis.py
 import pytest
-from fastapi.testclient import TestClient
 from unittest.mock import patch, MagicMock, AsyncMock
 
-from app.main import app
 from app.analysis.schemas import BriefIn, BriefItem, WebSearchResult
 from app.analysis.campaign_service import CampaignAnalysisService
 
-client = TestClient(app)
-
 # Données de test
 TEST_BRIEF = {
     "campaign_name": "Campagne Test",
@@ -30,7 +26,7 @@ TEST_BRIEF = {
 }
 
 # Tests
-def test_analyse_campaign_endpoint():
+def test_analyse_campaign_endpoint(client):
     """Test de l'endpoint /analyse_campaign"""
     response = client.post("/analysis/campaign/analyse_campaign", json=TEST_BRIEF)
     assert response.status_code == 200
@@ -1,17 +1,13 @@
 # backend/tests/test_e2e_api.py
 import pytest
-from fastapi.testclient import TestClient
 import json
 from typing import Dict, Any, List
 import time
 
-from app.main import app
 from app.generation.models import ContentType as GenContentType, ContentTone
 from app.moderation.models import ContentType as ModContentType, ModerationType
 from app.publication.models import SocialMediaPlatform, PublicationStatus
 
-client = TestClient(app)
-
 # Données de test
 TEST_CONTENT = "Le développement durable est une approche qui vise à améliorer la qualité de vie humaine tout en protégeant l'environnement."
 TEST_UNSAFE_CONTENT = "Ce texte contient des insultes et des menaces qui ne devraient pas être publiées."
@@ -21,31 +17,31 @@ TWITTER_PROMPT = "Écrivez un tweet sur les innovations technologiques récentes
 class TestEndToEndWorkflows:
     """Tests de bout en bout (E2E) pour les flux de travail API complets."""
     
-    def test_health_check(self):
+    def test_health_check(self, client):
         """Vérifier que l'API est en bon état de fonctionnement."""
         response = client.get("/health")
         assert response.status_code == 200
         assert response.json()["status"] == "ok"
     
-    def test_generation_status(self):
+    def test_generation_status(self, client):
         """Vérifier que le service de génération est en bon état."""
         response = client.get("/generation/")
         assert response.status_code == 200
         assert response.json()["status"] == "ok"
     
-    def test_moderation_status(self):
+    def test_moderation_status(self, client):
         """Vérifier que le service de modération est en bon état."""
         response = client.get("/moderation/")
         assert response.status_code == 200
         assert response.json()["status"] == "ok"
     
-    def test_publication_status(self):
+    def test_publication_status(self, client):
         """Vérifier que le service de publication est en bon état."""
         response = client.get("/publication/")
         assert response.status_code == 200
         assert response.json()["status"] == "ok"
     
-    def test_complete_generation_moderation_publication_flow(self):
+    def test_complete_generation_moderation_publication_flow(self, client):
         """
         Test E2E du flux complet : Génération > Modération > Publication.
         Ce test simule un utilisateur qui génère du contenu, le modère, puis le publie.
@@ -113,7 +109,7 @@ class TestEndToEndWorkflows:
             assert content_pubs_response.status_code == 200
             assert len(content_pubs_response.json()) > 0
     
-    def test_direct_publication_with_moderation(self):
+    def test_direct_publication_with_moderation(self, client):
         """
         Test E2E de publication directe avec modération préalable.
         Ce test simule un utilisateur qui modère un contenu avant publication directe.
@@ -150,7 +146,7 @@ class TestEndToEndWorkflows:
         publication_result = publication_response.json()
         assert publication_result["status"] == PublicationStatus.PUBLISHED.value
     
-    def test_moderation_blocks_inappropriate_content(self):
+    def test_moderation_blocks_inappropriate_content(self, client):
         """
         Test que la modération bloque correctement le contenu inapproprié.
         Ce test simule un utilisateur qui tente de publier du contenu inapproprié.
@@ -181,7 +177,7 @@ class TestEndToEndWorkflows:
             # Cette partie du test ne s'exécute que si le contenu est effectivement détecté comme inapproprié
             print("Le contenu inapproprié a été correctement signalé")
     
-    def test_batch_moderation(self):
+    def test_batch_moderation(self, client):
         """
         Test de modération par lots.
         Ce test simule la modération de plusieurs contenus en une seule requête.
@@ -1,38 +1,82 @@
 # backend/tests/test_e2e_data_persistence.py
 import pytest
-from fastapi.testclient import TestClient
+import asyncio
+import logging
+from httpx import AsyncClient, ASGITransport
 import os
 import sqlite3
+from contextlib import closing
 import time
-import uuid
 from datetime import datetime, timedelta
 
+from sqlalchemy.engine import make_url
+
+from app.config import settings
 from app.main import app
+from tests.conftest import next_uid, rjson
 from app.generation.models import ContentType as GenContentType, ContentTone
 from app.moderation.models import ContentType as ModContentType, ModerationType
 from app.publication.models import SocialMediaPlatform
 
-client = TestClient(app)
+logger = logging.getLogger(__name__)
+
+# Certains tests envoient leurs requêtes à l'application via leur propre client ASGI : base de test pour tout le module
+pytestmark = pytest.mark.usefixtures("test_db_session_factory")
+
+
+def _on_disk_db_path():
+    """
+    Chemin absolu du fichier SQLite configuré pour l'application (settings.database_url),
+    celui sur lequel les tests s'exécutent avec l'option --on-disk-db.
+    """
+    return os.path.abspath(make_url(settings.database_url).database)
+
+
+def _connect_read_only(db_path):
+    """
+    Ouvrir une connexion SQLite en lecture seule pour l'introspection.
+    isolation_level=None évite les transactions implicites autour des SELECT.
+    """
+    return sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, isolation_level=None, cached_statements=32)
+
+@pytest.fixture(scope="class")
+def seed_uid():
+    """Identifiant unique inclus dans les prompts du lot initial de la classe."""
+    return next_uid()
+
+
+@pytest.fixture(scope="class")
+def seeded_contents(client, seed_uid):
+    """
+    Générer en une seule requête (et une seule transaction) les contenus utilisés par la classe.
+    Les réponses de l'API sont renvoyées telles quelles.
+    
+    Returns:
+        Dict[str, Dict]: Les contenus générés, indexés par nom de scénario
+    """
+    prompts = {
+        "generation": "Les avantages de l'intelligence artificielle pour les entreprises",
+        "complete_flow": f"Test de persistance du flux complet {seed_uid}",
+        "restart": f"Test de persistance après redémarrage {seed_uid}",
+    }
+    response = client.post(
+        "/generation/linkedin/batch",
+        json=list(prompts.values()),
+        params={"tone": ContentTone.PROFESSIONAL.value}
+    )
+    assert response.status_code == 200
+    return dict(zip(prompts, rjson(response)))
+
 
 class TestDataPersistence:
     """Tests vérifiant la persistance des données et leur récupération."""
     
-    def test_generation_persistence(self):
+    def test_generation_persistence(self, client, seeded_contents):
         """
         Vérifier que les contenus générés sont persistés et récupérables.
         """
-        # 1. Générer du contenu via l'API
-        generation_response = client.post(
-            "/generation/linkedin",
-            params={
-                "prompt": "Les avantages de l'intelligence artificielle pour les entreprises",
-                "tone": ContentTone.PROFESSIONAL.value,
-                "include_hashtags": True
-            }
-        )
-        
-        assert generation_response.status_code == 200
-        generation_result = generation_response.json()
+        # 1. Contenu généré via l'API par le lot initial
+        generation_result = seeded_contents["generation"]
         assert "content_id" in generation_result
         content_id = generation_result["content_id"]
         
@@ -41,25 +85,19 @@ class TestDataPersistence:
         
         # Vérifier que le contenu peut être récupéré
         assert get_content_response.status_code == 200
-        retrieved_content = get_content_response.json()
+        retrieved_content = rjson(get_content_response)
         assert retrieved_content["content_id"] == content_id
         assert retrieved_content["content"] == generation_result["content"]
         
-        # 3. Vérifier que le contenu apparaît dans la liste des contenus générés
-        all_contents_response = client.get("/generation/contents")
-        assert all_contents_response.status_code == 200
-        all_contents = all_contents_response.json()
+        # 3. Vérifier que le contenu apparaît dans la liste des contenus générés (filtrée sur son ID)
+        contents_response = client.get("/generation/contents", params={"ids": [content_id]})
+        assert contents_response.status_code == 200
+        contents = rjson(contents_response)
         
-        # Chercher notre contenu dans la liste
-        found = False
-        for content in all_contents:
-            if content["content_id"] == content_id:
-                found = True
-                break
-        
-        assert found, f"Le contenu avec ID {content_id} n'a pas été trouvé dans la liste des contenus générés"
+        assert len(contents) == 1, f"Le contenu avec ID {content_id} n'a pas été trouvé dans la liste des contenus générés"
+        assert contents[0]["content_id"] == content_id
 
-    def test_moderation_result_consistency(self):
+    def test_moderation_result_consistency(self, client):
         """
         Vérifier que les résultats de modération sont cohérents entre les appels.
         """
@@ -75,7 +113,7 @@ class TestDataPersistence:
         )
         
         assert first_moderation.status_code == 200
-        first_result = first_moderation.json()
+        first_result = rjson(first_moderation)
         
         # 2. Deuxième modération avec le même texte
         second_moderation = client.post(
@@ -87,7 +125,7 @@ class TestDataPersistence:
         )
         
         assert second_moderation.status_code == 200
-        second_result = second_moderation.json()
+        second_result = rjson(second_moderation)
         
         # 3. Vérifier la cohérence des résultats
         assert first_result["flagged"] == second_result["flagged"]
@@ -97,12 +135,12 @@ class TestDataPersistence:
             if category in second_result["categories"]:
                 assert flagged == second_result["categories"][category], f"Incohérence pour la catégorie {category}"
 
-    def test_publication_persistence(self):
+    def test_publication_persistence(self, client, uid):
         """
         Vérifier que les publications sont persistées et récupérables.
         """
         # 1. Créer une publication directe
-        unique_content = f"Test de publication persistance {uuid.uuid4()}"
+        unique_content = f"Test de publication persistance {uid}"
         publication_response = client.post(
             "/publication/direct",
             json={
@@ -116,7 +154,7 @@ class TestDataPersistence:
         )
         
         assert publication_response.status_code == 200
-        publication_result = publication_response.json()
+        publication_result = rjson(publication_response)
         assert "publication_id" in publication_result
         publication_id = publication_result["publication_id"]
         
@@ -125,40 +163,24 @@ class TestDataPersistence:
         
         # Vérifier que la publication peut être récupérée
         assert get_publication_response.status_code == 200
-        retrieved_publication = get_publication_response.json()
+        retrieved_publication = rjson(get_publication_response)
         assert retrieved_publication["publication_id"] == publication_id
         assert retrieved_publication["content_id"] == publication_result["content_id"]
         
-        # 3. Vérifier que la publication apparaît dans la liste des publications
-        all_publications_response = client.get("/publication/publications")
-        assert all_publications_response.status_code == 200
-        all_publications = all_publications_response.json()
-        
-        # Chercher notre publication dans la liste
-        found = False
-        for pub in all_publications:
-            if pub["publication_id"] == publication_id:
-                found = True
-                break
+        # 3. Vérifier que la publication apparaît dans la liste des publications (filtrée sur son ID)
+        publications_response = client.get("/publication/publications", params={"ids": [publication_id]})
+        assert publications_response.status_code == 200
+        publications = rjson(publications_response)
         
-        assert found, f"La publication avec ID {publication_id} n'a pas été trouvée dans la liste des publications"
+        assert len(publications) == 1, f"La publication avec ID {publication_id} n'a pas été trouvée dans la liste des publications"
+        assert publications[0]["publication_id"] == publication_id
 
-    def test_complete_flow_persistence(self):
+    def test_complete_flow_persistence(self, client, seeded_contents):
         """
         Tester la persistance du flux complet: génération -> modération -> publication.
         """
-        # 1. Générer un contenu
-        unique_prompt = f"Test de persistance du flux complet {uuid.uuid4()}"
-        generation_response = client.post(
-            "/generation/linkedin",
-            params={
-                "prompt": unique_prompt,
-                "tone": ContentTone.PROFESSIONAL.value
-            }
-        )
-        
-        assert generation_response.status_code == 200
-        generation_result = generation_response.json()
+        # 1. Contenu généré via l'API par le lot initial
+        generation_result = seeded_contents["complete_flow"]
         content_id = generation_result["content_id"]
         
         # 2. Modérer le contenu
@@ -171,7 +193,7 @@ class TestDataPersistence:
         )
         
         assert moderation_response.status_code == 200
-        moderation_result = moderation_response.json()
+        moderation_result = rjson(moderation_response)
         
         # Si le contenu est approprié, le publier
         if not moderation_result["flagged"]:
@@ -185,119 +207,85 @@ class TestDataPersistence:
             )
             
             assert publication_response.status_code == 200
-            publication_result = publication_response.json()
+            publication_result = rjson(publication_response)
             publication_id = publication_result["publication_id"]
             
             # 4. Vérifier que le contenu et la publication sont liés
             pub_content_response = client.get(f"/publication/content/{content_id}/publications")
             assert pub_content_response.status_code == 200
-            content_publications = pub_content_response.json()
+            content_publications = rjson(pub_content_response)
             
             # Vérifier que notre publication apparaît dans les publications liées au contenu
-            found = False
-            for pub in content_publications:
-                if pub["publication_id"] == publication_id:
-                    found = True
-                    break
-            
-            assert found, f"La publication avec ID {publication_id} n'a pas été trouvée dans les publications liées au contenu {content_id}"
+            publication_ids = {pub["publication_id"] for pub in content_publications}
+            assert publication_id in publication_ids, f"La publication avec ID {publication_id} n'a pas été trouvée dans les publications liées au contenu {content_id}"
     
-    def test_data_persistence_after_restart(self):
+    def test_data_persistence_after_restart(self, client, seeded_contents, seed_uid):
         """
         Simuler un redémarrage du service et vérifier que les données sont toujours disponibles.
         
         Note: Ce test est plus une démonstration conceptuelle. Dans un environnement de test réel,
         vous pourriez avoir besoin d'adapter cette approche en fonction de votre architecture.
         """
-        # 1. Générer un contenu unique pour ce test
-        unique_id = str(uuid.uuid4())
-        unique_prompt = f"Test de persistance après redémarrage {unique_id}"
+        # 1. Contenu unique généré via l'API par le lot initial
+        unique_id = seed_uid
+        content_id = seeded_contents["restart"]["content_id"]
         
-        generation_response = client.post(
-            "/generation/linkedin",
-            params={
-                "prompt": unique_prompt,
-                "tone": ContentTone.PROFESSIONAL.value
-            }
-        )
-        
-        assert generation_response.status_code == 200
-        content_id = generation_response.json()["content_id"]
-        
-        # 2. Simuler un redémarrage du service en créant un nouveau client
+        # 2. Simuler un redémarrage du service
+        # Le TestClient ne conserve aucun état entre les requêtes : le client partagé suffit.
         # Dans un environnement réel, vous pourriez redémarrer le serveur ou utiliser un 
         # mécanisme spécifique à votre architecture
-        restart_client = TestClient(app)
         
         # 3. Tenter de récupérer le contenu après "redémarrage"
-        get_content_response = restart_client.get(f"/generation/content/{content_id}")
+        get_content_response = client.get(f"/generation/content/{content_id}")
         
         # Si votre service utilise une base de données persistante et est correctement configuré,
         # le contenu devrait être récupérable après redémarrage
         assert get_content_response.status_code == 200
-        retrieved_content = get_content_response.json()
+        retrieved_content = rjson(get_content_response)
         assert retrieved_content["content_id"] == content_id
         assert unique_id in retrieved_content["parameters"]["prompt"]
 
-    def test_multiple_content_types_moderation_persistence(self):
+    @pytest.mark.asyncio
+    async def test_multiple_content_types_moderation_persistence(self, uid):
         """
         Tester la persistance des modérations sur différents types de contenus.
+        Les modérations étant indépendantes, elles sont envoyées en parallèle.
         """
-        # Créer un identifiant unique pour ce test
-        unique_id = str(uuid.uuid4())[:8]
-        
-        # Créer une liste de contenus de différents types à modérer
+        # Contenus de différents types à modérer (image et audio simulés par du texte)
         test_contents = [
-            f"Texte standard pour test de modération multiple {unique_id}",
-            f"Ceci est un texte qui simule une description d'image {unique_id}",
-            f"Transcription audio simulée pour test de modération {unique_id}"
+            (f"Texte standard pour test de modération multiple {uid}", ModContentType.TEXT),
+            (f"Ceci est un texte qui simule une description d'image {uid}", ModContentType.IMAGE),
+            (f"Transcription audio simulée pour test de modération {uid}", ModContentType.AUDIO)
         ]
         
-        # Dictionnaire pour stocker les résultats
-        moderation_results = {}
+        async def moderate_all(async_client):
+            """Modérer tous les contenus en parallèle et retourner les réponses dans l'ordre."""
+            return await asyncio.gather(*[
+                async_client.post(
+                    f"/moderation/moderate/{content_type.value}",
+                    params={
+                        "content": content,
+                        "moderation_type": ModerationType.COMBINED.value
+                    }
+                )
+                for content, content_type in test_contents
+            ])
         
         # 1. Modérer chaque contenu
-        for idx, content in enumerate(test_contents):
-            content_type = ModContentType.TEXT
-            if idx == 1:
-                content_type = ModContentType.IMAGE  # Simulé - en réalité ce serait une URL d'image
-            elif idx == 2:
-                content_type = ModContentType.AUDIO  # Simulé - en réalité ce serait une URL d'audio
-                
-            moderation_response = client.post(
-                f"/moderation/moderate/{content_type.value}",
-                params={
-                    "content": content,
-                    "moderation_type": ModerationType.COMBINED.value
-                }
-            )
-            
-            assert moderation_response.status_code == 200
-            result = moderation_response.json()
-            moderation_results[content] = result
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as async_client:
+            responses = await moderate_all(async_client)
         
-        # 2. Simuler un redémarrage du service
-        restart_client = TestClient(app)
+        assert all(response.status_code == 200 for response in responses)
+        original_results = [rjson(response) for response in responses]
+        
+        # 2. Simuler un redémarrage du service avec un nouveau client
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as restart_client:
+            new_responses = await moderate_all(restart_client)
         
         # 3. Vérifier que les résultats de modération sont cohérents après redémarrage
-        for content, original_result in moderation_results.items():
-            # Effectuer à nouveau la modération du même contenu
-            content_type = ModContentType.TEXT  # Par défaut
-            if "image" in content:
-                content_type = ModContentType.IMAGE
-            elif "audio" in content:
-                content_type = ModContentType.AUDIO
-                
-            new_moderation_response = restart_client.post(
-                f"/moderation/moderate/{content_type.value}",
-                params={
-                    "content": content,
-                    "moderation_type": ModerationType.COMBINED.value
-                }
-            )
-            
-            assert new_moderation_response.status_code == 200
-            new_result = new_moderation_response.json()
+        for (content, _), original_result, new_response in zip(test_contents, original_results, new_responses):
+            assert new_response.status_code == 200
+            new_result = rjson(new_response)
             
             # Vérifier que le statut général est cohérent
             assert original_result["flagged"] == new_result["flagged"], f"Incohérence dans le statut flagged pour: {content}"
@@ -308,63 +296,59 @@ class TestDataPersistence:
                     assert flagged == new_result["categories"][category], f"Incohérence pour la catégorie {category} dans: {content}"
 
 
+@pytest.mark.on_disk_db
 class TestDatabaseState:
     """Tests examinant directement l'état de la base de données SQLite."""
     
-    def test_sqlite_database_state(self):
+    def test_sqlite_database_state(self, client):
         """
         Vérifie l'état de la base de données SQLite directement.
         Note: Ce test dépend de la base de données SQLite spécifique.
         Si vous utilisez une autre base de données, ce test devra être adapté.
+        Le client (lifespan réel avec --on-disk-db) garantit que les tables ont été créées.
         """
-        db_path = "/workspaces/Skyent-dev/backend/skyent.db"
+        db_path = _on_disk_db_path()
         
         # Vérifier que le fichier de base de données existe
         assert os.path.exists(db_path), f"Base de données SQLite introuvable à {db_path}"
         
-        # Se connecter directement à la base de données
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # Lister les tables de la base de données
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-        tables = cursor.fetchall()
-        
-        # Afficher les tables pour information
-        table_names = [table[0] for table in tables]
-        print(f"Tables dans la base de données: {table_names}")
-        
-        # Vérifier quelques tables clés (à adapter selon votre schéma)
-        expected_tables = ['generated_contents', 'publications', 'moderation_results', 'analyses']
-        
-        # Vérifier que certaines tables essentielles existent
-        for table in expected_tables:
-            if table not in table_names:
-                print(f"*** ERREUR: Table {table} non trouvée dans la base de données ***")
-            assert table in table_names, f"Table {table} non trouvée dans la base de données"
-        
-        # Si la table "generated_contents" existe, vérifier son contenu
-        if 'generated_contents' in table_names:
-            cursor.execute("SELECT COUNT(*) FROM generated_contents;")
-            count = cursor.fetchone()[0]
-            print(f"Nombre de contenus générés dans la base de données: {count}")
-            # Commenté pour l'instant car nous n'avons pas encore généré de contenu
-            # assert count > 0, "Aucun contenu généré trouvé dans la base de données"
-        
-        # Fermer la connexion
-        conn.close()
-        
-    def test_moderation_database_persistence(self):
+        # Se connecter directement à la base de données, en lecture seule et sans transaction implicite
+        with closing(_connect_read_only(db_path)) as conn:
+            # Vérifier que l'application a bien activé le mode WAL (lecteurs et écrivains non bloquants)
+            journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+            assert journal_mode == "wal", "La base de données SQLite n'est pas en mode WAL"
+            
+            # Lister les tables de la base de données
+            table_names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table';")}
+            
+            # Journaliser les tables pour information
+            logger.debug("Tables dans la base de données: %s", table_names)
+            
+            # Vérifier quelques tables clés (à adapter selon votre schéma)
+            expected_tables = ['generated_contents', 'publications', 'moderation_results', 'analyses']
+            
+            # Vérifier que certaines tables essentielles existent
+            for table in expected_tables:
+                assert table in table_names, f"Table {table} non trouvée dans la base de données"
+            
+            # Si la table "generated_contents" existe, vérifier son contenu
+            if 'generated_contents' in table_names:
+                count = conn.execute("SELECT COUNT(*) FROM generated_contents;").fetchone()[0]
+                logger.debug("Nombre de contenus générés dans la base de données: %d", count)
+                # Commenté pour l'instant car nous n'avons pas encore généré de contenu
+                # assert count > 0, "Aucun contenu généré trouvé dans la base de données"
+    
+    def test_moderation_database_persistence(self, client, uid):
         """
         Vérifie que les résultats de modération sont correctement stockés dans la base de données.
         """
-        db_path = "/workspaces/Skyent-dev/backend/skyent.db"
+        db_path = _on_disk_db_path()
         
         # Vérifier que le fichier de base de données existe
         assert os.path.exists(db_path), f"Base de données SQLite introuvable à {db_path}"
         
         # Créer un contenu unique à modérer
-        unique_text = f"Contenu à modérer pour test de persistance en base de données {uuid.uuid4()}"
+        unique_text = f"Contenu à modérer pour test de persistance en base de données {uid}"
         
         # Effectuer une modération via l'API
         moderation_response = client.post(
@@ -376,35 +360,32 @@ class TestDatabaseState:
         )
         
         assert moderation_response.status_code == 200
-        moderation_result = moderation_response.json()
-        
-        # Se connecter directement à la base de données
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # Vérifier que la table des modérations existe
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='moderation_results';")
-        table_exists = cursor.fetchone()
-        
-        if table_exists:
-            # Rechercher notre entrée de modération dans la base de données
-            # Note: Ceci suppose que la table contient une colonne 'content' ou similaire
-            cursor.execute("SELECT * FROM moderation_results WHERE content LIKE ?;", (f"%{unique_text[:50]}%",))
-            result = cursor.fetchone()
+        moderation_result = rjson(moderation_response)
+        
+        # Se connecter directement à la base de données, en lecture seule et sans transaction implicite
+        with closing(_connect_read_only(db_path)) as conn:
+            # Vérifier que la table des modérations existe
+            table_exists = conn.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' AND name='moderation_results';"
+            ).fetchone()
             
-            # Si nous trouvons le résultat, vérifier qu'il correspond à notre modération
-            if result:
-                print(f"Résultat de modération trouvé en base de données: {result}")
-                # Vérifier que le statut de modération (flagged) correspond
-                # Ceci dépend de la structure exacte de votre table, adaptez selon votre schéma
-                assert result[2] == int(moderation_result["flagged"]), "Le statut de modération ne correspond pas"
+            if table_exists:
+                # Rechercher notre entrée de modération dans la base de données
+                # Note: Ceci suppose que la table contient une colonne 'content' ou similaire
+                result = conn.execute(
+                    "SELECT * FROM moderation_results WHERE content LIKE ?;", (f"%{unique_text[:50]}%",)
+                ).fetchone()
+                
+                # Si nous trouvons le résultat, vérifier qu'il correspond à notre modération
+                if result:
+                    logger.debug("Résultat de modération trouvé en base de données: %s", result)
+                    # Vérifier que le statut de modération (flagged) correspond
+                    # Ceci dépend de la structure exacte de votre table, adaptez selon votre schéma
+                    assert result[2] == int(moderation_result["flagged"]), "Le statut de modération ne correspond pas"
+                else:
+                    # Si le résultat n'est pas trouvé, c'est peut-être normal si les modérations ne sont pas persistées
+                    # Dans ce cas, ce test est informatif plutôt que contraignant
+                    logger.debug("Résultat de modération non trouvé dans la base de données. "
+                                 "Si la persistance des modérations n'est pas implémentée, ce message est normal.")
             else:
-                # Si le résultat n'est pas trouvé, c'est peut-être normal si les modérations ne sont pas persistées
-                # Dans ce cas, ce test est informatif plutôt que contraignant
-                print("Résultat de modération non trouvé dans la base de données. " 
-                      "Si la persistance des modérations n'est pas implémentée, ce message est normal.")
-        else:
-            print("Table 'moderation_results' non trouvée. La persistance des modérations n'est peut-être pas implémentée.")
-        
-        # Fermer la connexion
-        conn.close()
+                logger.debug("Table 'moderation_results' non trouvée. La persistance des modérations n'est peut-être pas implémentée.")
@@ -1,100 +1,50 @@
 # backend/tests/test_e2e_error_handling.py
 import pytest
-from fastapi.testclient import TestClient
 import json
 from typing import Dict, Any
-import uuid
 
-from app.main import app
+from tests.conftest import NONEXISTENT_UUID, rjson
 from app.generation.models import ContentType, ContentTone
 from app.moderation.models import ContentType as ModContentType, ModerationType
 from app.publication.models import SocialMediaPlatform
 
-client = TestClient(app)
-
 class TestErrorHandling:
     """Tests des scénarios d'erreur pour valider la robustesse de l'API."""
     
-    def test_generation_invalid_parameters(self):
-        """Tester la validation des paramètres de génération invalides."""
-        # Test avec un type de contenu inexistant
-        response = client.post(
-            "/generation/content",
-            json={
-                "content_type": "inexistant_type",
-                "prompt": "Test prompt"
-            }
-        )
-        
-        assert response.status_code == 422  # Validation error
-        
-        # Test avec un prompt vide
-        response = client.post(
-            "/generation/content",
-            json={
-                "content_type": ContentType.LINKEDIN_POST.value,
-                "prompt": ""
-            }
-        )
-        
-        assert response.status_code == 422  # Validation error
-    
-    def test_get_nonexistent_content(self):
-        """Tester la récupération d'un contenu inexistant."""
-        fake_id = str(uuid.uuid4())
-        response = client.get(f"/generation/content/{fake_id}")
-        
-        assert response.status_code == 404
-        assert "non trouvé" in response.json()["detail"]
-    
-    def test_moderation_invalid_parameters(self):
-        """Tester la validation des paramètres de modération invalides."""
-        # Test avec un type de modération inexistant
-        response = client.post(
-            "/moderation/moderate",
-            json={
-                "content": "Test content",
-                "content_type": ModContentType.TEXT.value,
-                "moderation_type": "inexistant_type"
-            }
-        )
-        
-        assert response.status_code == 422  # Validation error
-        
-        # Test avec un contenu vide
-        response = client.post(
-            "/moderation/moderate/text",
-            params={
-                "content": "",
-                "moderation_type": ModerationType.COMBINED.value
-            }
-        )
+    @pytest.mark.parametrize("method,path,params,body", [
+        # Génération avec un type de contenu inexistant
+        ("POST", "/generation/content", None, {"content_type": "inexistant_type", "prompt": "Test prompt"}),
+        # Génération avec un prompt vide
+        ("POST", "/generation/content", None, {"content_type": ContentType.LINKEDIN_POST.value, "prompt": ""}),
+        # Modération avec un type de modération inexistant
+        ("POST", "/moderation/moderate", None, {
+            "content": "Test content",
+            "content_type": ModContentType.TEXT.value,
+            "moderation_type": "inexistant_type"
+        }),
+        # Modération avec un contenu vide
+        ("POST", "/moderation/moderate/text", {"content": "", "moderation_type": ModerationType.COMBINED.value}, None),
+    ], ids=["generation-type", "generation-prompt", "moderation-type", "moderation-content"])
+    def test_invalid_parameters(self, client, method, path, params, body):
+        """Tester la validation des paramètres invalides de génération et de modération."""
+        response = client.request(method, path, params=params, json=body)
         
         assert response.status_code == 422  # Validation error
     
-    def test_get_nonexistent_publication(self):
-        """Tester la récupération d'une publication inexistante."""
-        fake_id = str(uuid.uuid4())
-        response = client.get(f"/publication/publication/{fake_id}")
-        
-        assert response.status_code == 404
-        assert "non trouvée" in response.json()["detail"]
-    
-    def test_publish_nonexistent_content(self):
-        """Tester la publication d'un contenu inexistant."""
-        fake_id = str(uuid.uuid4())
-        response = client.post(
-            "/publication/publish",
-            json={
-                "content_id": fake_id,
-                "platform": SocialMediaPlatform.LINKEDIN.value
-            }
-        )
+    @pytest.mark.parametrize("method,path,body,status", [
+        ("GET", f"/generation/content/{NONEXISTENT_UUID}", None, 404),
+        ("GET", f"/publication/publication/{NONEXISTENT_UUID}", None, 404),
+        ("POST", "/publication/publish", {"content_id": NONEXISTENT_UUID, "platform": SocialMediaPlatform.LINKEDIN.value}, 400),
+    ], ids=["content", "publication", "publish-content"])
+    def test_nonexistent_resource(self, client, method, path, body, status):
+        """Tester la récupération ou la publication d'une ressource inexistante."""
+        response = client.request(method, path, json=body)
         
-        assert response.status_code == 400  # Bad request or 404
-        assert "non trouvé" in response.json()["detail"]
+        assert response.status_code == status
+        # Recherche directe dans les octets du corps, sans décodage JSON
+        assert b"non trouv" in response.content
     
-    def test_batch_moderation_empty_list(self):
+    def test_batch_moderation_empty_list(self, client):
         """Tester la modération par lots avec une liste vide."""
         response = client.post(
             "/moderation/moderate/batch",
@@ -106,9 +56,9 @@ class TestErrorHandling:
         
         # Devrait renvoyer une liste vide mais pas d'erreur
         assert response.status_code == 200
-        assert response.json() == []
+        assert rjson(response) == []
     
-    def test_direct_publish_invalid_platform(self):
+    def test_direct_publish_invalid_platform(self, client):
         """Tester la publication directe vers une plateforme invalide."""
         response = client.post(
             "/publication/direct",
@@ -1,19 +1,26 @@
 # backend/tests/test_e2e_performance.py
 import pytest
-from fastapi.testclient import TestClient
+import pytest_asyncio
+import httpx
+from httpx import AsyncClient, ASGITransport
 import time
-import statistics
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any
 import asyncio
 import json
+import orjson
+from types import SimpleNamespace
+from urllib.parse import urlencode
 
 from app.main import app
+from tests.conftest import rjson
 from app.generation.models import ContentType, ContentTone
 from app.moderation.models import ContentType as ModContentType, ModerationType
+from app.generation.service import generation_service
+from app.moderation.service import DetoxifyModerationProvider, moderation_service
 from app.publication.models import SocialMediaPlatform
 
-client = TestClient(app)
-
 # Données de test pour les tests de performance
 TEST_PROMPTS = [
     "Les avantages du développement durable pour les entreprises",
@@ -23,143 +30,256 @@ TEST_PROMPTS = [
     "Comment améliorer la productivité en télétravail"
 ]
 
+# Textes de test pour la modération
+TEST_TEXTS = [
+    "Ce texte est un exemple de contenu normal qui ne devrait pas être signalé.",
+    "Voici un autre exemple de texte sans contenu problématique.",
+    "Ce document présente des informations factuelle sur l'entreprise.",
+    "Résumé des principales réalisations du trimestre dernier.",
+    "Perspectives économiques pour l'année à venir selon les experts."
+]
+
+# Contenus de test pour la publication
+TEST_CONTENTS = [
+    f"Publication test numéro {i} pour mesurer le temps de réponse."
+    for i in range(1, 6)
+]
+
+# Requêtes sérialisées une seule fois au chargement du module,
+# pour que les mesures ne comptent pas le coût de json.dumps / urlencode côté client
+_JSON_HDR = {"content-type": "application/json"}
+_GEN_QS = {
+    prompt: urlencode({"prompt": prompt, "tone": ContentTone.PROFESSIONAL.value})
+    for prompt in TEST_PROMPTS
+}
+_MOD_BATCH_QS = urlencode({"moderation_type": ModerationType.COMBINED.value})
+_MOD_BATCH_PAYLOAD = orjson.dumps(TEST_TEXTS)
+_PUB_PAYLOADS = [
+    orjson.dumps({"content": content, "platform": SocialMediaPlatform.TWITTER.value})
+    for content in TEST_CONTENTS
+]
+
+# Paramètres communs des mesures : pytest-benchmark calibre et agrège les résultats
+BENCHMARK_ROUNDS = 20
+BENCHMARK_WARMUP_ROUNDS = 2
+
+# Nombre de threads qui partagent le TestClient synchrone pour les mesures concurrentes
+CONCURRENT_WORKERS = 8
+
+# Prompts traités par le test du flux complet (plus long) et nombre de flux menés en parallèle
+FLOW_PROMPTS = TEST_PROMPTS[:2]
+FLOW_MAX_CONCURRENCY = 4
+
+# Cas mesurés par test_endpoint_latency : requêtes (url, kwargs) envoyées ensemble à chaque tour.
+# Les régressions sont détectées par comparaison avec les mesures sauvegardées (voir pytest.ini et `make bench-compare`).
+ENDPOINT_CASES = [
+    pytest.param(
+        [(f"/generation/linkedin?{qs}", {}) for qs in _GEN_QS.values()],
+        id="generation"
+    ),
+    pytest.param(
+        [(f"/moderation/moderate/batch?{_MOD_BATCH_QS}", {"content": _MOD_BATCH_PAYLOAD, "headers": _JSON_HDR})],
+        id="moderation-batch"
+    ),
+    pytest.param(
+        [("/publication/direct", {"content": payload, "headers": _JSON_HDR}) for payload in _PUB_PAYLOADS],
+        id="publication"
+    ),
+]
+
+
+# Réponses simulées des SDK : les mesures portent sur l'application, pas sur le réseau ni les API externes
+_GENERATION_JSON = orjson.dumps({
+    "content": "Post LinkedIn simulé pour les mesures de performance. #Performance",
+    "variants": ["Variante simulée"],
+    "hashtags": ["#Performance"],
+    "title": "Titre simulé",
+    "summary": "Résumé simulé"
+}).decode()
+_OPENAI_COMPLETION = SimpleNamespace(
+    choices=[SimpleNamespace(message=SimpleNamespace(content=_GENERATION_JSON))]
+)
+
+
+class _Scores(dict):
+    """Catégories ou scores d'un résultat de modération OpenAI simulé (model_dump comme les modèles du SDK)."""
+    
+    def model_dump(self):
+        return dict(self)
+
+
+_OPENAI_CATEGORIES = ("hate", "harassment", "self-harm", "sexual", "violence")
+_OPENAI_MODERATION_RESULT = SimpleNamespace(
+    flagged=False,
+    categories=_Scores(dict.fromkeys(_OPENAI_CATEGORIES, False)),
+    category_scores=_Scores(dict.fromkeys(_OPENAI_CATEGORIES, 0.01))
+)
+
+
+def _openai_chat_create(**kwargs):
+    """Remplace chat.completions.create du client OpenAI synchrone utilisé par la génération."""
+    return _OPENAI_COMPLETION
+
+
+async def _openai_moderations_create(input, **kwargs):
+    """Remplace moderations.create du client OpenAI asynchrone : un résultat non signalé par texte."""
+    return SimpleNamespace(results=[_OPENAI_MODERATION_RESULT] * len(input))
+
+
+def _fake_detoxify_predict(self, text):
+    """Remplace DetoxifyModerationProvider._predict sans charger le modèle, au format de Detoxify.predict."""
+    scores = [0.01] * len(text) if isinstance(text, list) else 0.01
+    return {"toxicity": scores, "insult": scores}
+
+
+@pytest.fixture(scope="module", autouse=True)
+def stub_sdk_clients():
+    """
+    Remplacer, pour tout le module, les clients SDK des services partagés par l'application :
+    client OpenAI de la génération, client OpenAI du fournisseur combiné et modèle Detoxify.
+    """
+    combined_provider = moderation_service.providers[ModerationType.COMBINED]
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(
+            generation_service,
+            "openai_client",
+            SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=_openai_chat_create)))
+        )
+        mp.setattr(
+            combined_provider.providers["openai"],
+            "client",
+            SimpleNamespace(moderations=SimpleNamespace(create=_openai_moderations_create))
+        )
+        mp.setattr(DetoxifyModerationProvider, "_predict", _fake_detoxify_predict)
+        yield
+
+
+@pytest.fixture(scope="module")
+def bench_loop(test_db_session_factory):
+    """
+    Boucle d'événements des benchmarks (tests synchrones pilotés par pytest-benchmark) et client ASGI
+    ouvert dans cette boucle. La boucle n'est pas installée comme boucle courante (loop_factory) :
+    celle de la session pytest-asyncio reste intacte.
+    """
+    with asyncio.Runner(loop_factory=asyncio.new_event_loop) as runner:
+        bench_client = AsyncClient(
+            transport=ASGITransport(app=app),
+            base_url="http://test",
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=100)
+        )
+        try:
+            yield runner, bench_client
+        finally:
+            runner.run(bench_client.aclose())
+
+@pytest_asyncio.fixture(scope="module")
+async def async_client(test_db_session_factory):
+    """
+    Client HTTP asynchrone partagé par le module, branché directement sur l'application ASGI
+    (base de données de test en mémoire, voir conftest).
+    Contrairement à TestClient, il permet d'envoyer plusieurs requêtes en parallèle avec asyncio.gather.
+    """
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test",
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=100)
+    ) as ac:
+        yield ac
+
+
 class TestAPIPerformance:
     """Tests de performance pour mesurer la réactivité de l'API sous charge."""
     
-    def measure_response_time(self, func) -> float:
-        """
-        Mesurer le temps de réponse d'une fonction.
-        
-        Args:
-            func: La fonction à mesurer
-            
-        Returns:
-            float: Le temps de réponse en secondes
-        """
-        start_time = time.time()
-        func()
-        end_time = time.time()
-        return end_time - start_time
-    
-    def test_generation_response_time(self):
-        """Mesurer le temps de réponse du service de génération."""
-        response_times = []
-        
-        for prompt in TEST_PROMPTS:
-            def generation_request():
-                return client.post(
-                    "/generation/linkedin",
-                    params={
-                        "prompt": prompt,
-                        "tone": ContentTone.PROFESSIONAL.value
-                    }
-                )
-            
-            response_time = self.measure_response_time(generation_request)
-            response_times.append(response_time)
+    @pytest.mark.benchmark(group="endpoint-latency")
+    @pytest.mark.parametrize("calls", ENDPOINT_CASES)
+    def test_endpoint_latency(self, benchmark, bench_loop, calls):
+        """Mesurer le temps de réponse d'un endpoint, les requêtes d'un même cas étant envoyées en parallèle."""
+        runner, bench_client = bench_loop
         
-        # Calcul des statistiques
-        avg_time = statistics.mean(response_times)
-        max_time = max(response_times)
-        min_time = min(response_times)
+        async def send_all():
+            return await asyncio.gather(*[
+                bench_client.post(url, **kwargs) for url, kwargs in calls
+            ])
         
-        print(f"\nTemps de réponse génération - Moy: {avg_time:.2f}s, Min: {min_time:.2f}s, Max: {max_time:.2f}s")
+        # Le cache de résultats de modération est vidé avant chaque tour (non chronométré) :
+        # sinon, après l'échauffement, chaque tour ne mesurerait qu'une lecture du cache
+        responses = benchmark.pedantic(
+            lambda: runner.run(send_all()),
+            setup=moderation_service.clear_cache,
+            rounds=BENCHMARK_ROUNDS,
+            iterations=1,
+            warmup_rounds=BENCHMARK_WARMUP_ROUNDS
+        )
         
-        # Vérification des seuils acceptables (ajuster selon le contexte réel)
-        assert avg_time < 10.0, f"Temps de réponse moyen trop élevé: {avg_time:.2f}s"
+        assert all(response.status_code == 200 for response in responses)
+        benchmark.extra_info["request_count"] = len(calls)
     
-    def test_moderation_response_time(self):
-        """Mesurer le temps de réponse du service de modération."""
-        test_texts = [
-            "Ce texte est un exemple de contenu normal qui ne devrait pas être signalé.",
-            "Voici un autre exemple de texte sans contenu problématique.",
-            "Ce document présente des informations factuelle sur l'entreprise.",
-            "Résumé des principales réalisations du trimestre dernier.",
-            "Perspectives économiques pour l'année à venir selon les experts."
-        ]
-        
-        response_times = []
-        
-        for text in test_texts:
-            def moderation_request():
-                return client.post(
-                    "/moderation/moderate/text",
-                    params={
-                        "content": text,
-                        "moderation_type": ModerationType.COMBINED.value
-                    }
-                )
-            
-            response_time = self.measure_response_time(moderation_request)
-            response_times.append(response_time)
+    @pytest.mark.benchmark(group="generation-concurrency")
+    def test_concurrent_generation_latency_percentiles(self, benchmark, client):
+        """
+        Mesurer la distribution des latences de génération sous charge concurrente avec le TestClient synchrone.
+        Chaque requête est chronométrée individuellement pour obtenir des percentiles réalistes.
+        """
+        def time_one(qs):
+            start_time = time.perf_counter()
+            response = client.post(f"/generation/linkedin?{qs}")
+            elapsed = time.perf_counter() - start_time
+            assert response.status_code == 200
+            return elapsed
         
-        # Calcul des statistiques
-        avg_time = statistics.mean(response_times)
-        max_time = max(response_times)
-        min_time = min(response_times)
+        # Requête d'échauffement non chronométrée (imports paresseux, caches de modèles Pydantic)
+        assert client.post(f"/generation/linkedin?{next(iter(_GEN_QS.values()))}").status_code == 200
         
-        print(f"\nTemps de réponse modération - Moy: {avg_time:.2f}s, Min: {min_time:.2f}s, Max: {max_time:.2f}s")
+        # Plusieurs passages sur les prompts pour disposer d'assez d'échantillons
+        query_strings = list(_GEN_QS.values()) * 4
         
-        # Vérification des seuils acceptables (ajuster selon le contexte réel)
-        assert avg_time < 5.0, f"Temps de réponse moyen trop élevé: {avg_time:.2f}s"
-    
-    def test_publication_response_time(self):
-        """Mesurer le temps de réponse du service de publication."""
-        test_contents = [
-            "Publication test numéro 1 pour mesurer le temps de réponse.",
-            "Publication test numéro 2 pour mesurer le temps de réponse.",
-            "Publication test numéro 3 pour mesurer le temps de réponse.",
-            "Publication test numéro 4 pour mesurer le temps de réponse.",
-            "Publication test numéro 5 pour mesurer le temps de réponse."
-        ]
-        
-        response_times = []
-        
-        for content in test_contents:
-            def publication_request():
-                return client.post(
-                    "/publication/direct",
-                    json={
-                        "content": content,
-                        "platform": SocialMediaPlatform.TWITTER.value,
-                    }
-                )
-            
-            response_time = self.measure_response_time(publication_request)
-            response_times.append(response_time)
+        def run_all():
+            with ThreadPoolExecutor(max_workers=CONCURRENT_WORKERS) as executor:
+                return list(executor.map(time_one, query_strings))
         
-        # Calcul des statistiques
-        avg_time = statistics.mean(response_times)
-        max_time = max(response_times)
-        min_time = min(response_times)
+        # Un seul tour : le temps total du lot est enregistré par pytest-benchmark, les percentiles en extra_info
+        response_times = benchmark.pedantic(run_all, rounds=1, iterations=1)
         
-        print(f"\nTemps de réponse publication - Moy: {avg_time:.2f}s, Min: {min_time:.2f}s, Max: {max_time:.2f}s")
+        # Un seul passage vectorisé pour l'ensemble des percentiles
+        latencies = np.fromiter(response_times, dtype=np.float64, count=len(response_times))
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        benchmark.extra_info.update({
+            "p50": float(p50),
+            "p95": float(p95),
+            "p99": float(p99),
+            "request_count": len(query_strings),
+            "workers": CONCURRENT_WORKERS
+        })
         
         # Vérification des seuils acceptables (ajuster selon le contexte réel)
-        assert avg_time < 3.0, f"Temps de réponse moyen trop élevé: {avg_time:.2f}s"
+        assert p50 < 10.0, f"Latence médiane trop élevée: {p50:.2f}s"
+        assert p95 < 15.0, f"Latence p95 trop élevée: {p95:.2f}s"
+        assert p99 < 20.0, f"Latence p99 trop élevée: {p99:.2f}s"
     
-    def test_complete_flow_response_time(self):
-        """Mesurer le temps de réponse du flux complet génération > modération > publication."""
-        total_times = []
+    @pytest.mark.benchmark(group="complete-flow")
+    def test_complete_flow_response_time(self, benchmark, bench_loop):
+        """
+        Mesurer le temps de réponse du flux complet génération > modération > publication.
+        Les flux des différents prompts sont menés en parallèle : la génération de l'un
+        peut ainsi chevaucher la modération d'un autre.
+        """
+        runner, bench_client = bench_loop
+        semaphore = asyncio.Semaphore(FLOW_MAX_CONCURRENCY)
         
-        for prompt in TEST_PROMPTS[:2]:  # Limite à 2 pour le test complet qui est plus long
-            start_time = time.time()
-            
+        async def complete_flow(prompt):
+            async with semaphore:
+                await run_flow(prompt)
+        
+        async def run_flow(prompt):
             # 1. Génération
-            gen_response = client.post(
-                "/generation/linkedin",
-                params={
-                    "prompt": prompt,
-                    "tone": ContentTone.PROFESSIONAL.value
-                }
-            )
+            gen_response = await bench_client.post(f"/generation/linkedin?{_GEN_QS[prompt]}")
             
             assert gen_response.status_code == 200
-            gen_result = gen_response.json()
+            gen_result = rjson(gen_response)
             content = gen_result["content"]
             
             # 2. Modération
-            mod_response = client.post(
+            mod_response = await bench_client.post(
                 "/moderation/moderate/text",
                 params={
                     "content": content,
@@ -170,9 +290,9 @@ class TestAPIPerformance:
             assert mod_response.status_code == 200
             
             # 3. Publication (si non signalé)
-            mod_result = mod_response.json()
+            mod_result = rjson(mod_response)
             if not mod_result["flagged"]:
-                pub_response = client.post(
+                pub_response = await bench_client.post(
                     "/publication/direct",
                     json={
                         "content": content,
@@ -181,37 +301,47 @@ class TestAPIPerformance:
                 )
                 
                 assert pub_response.status_code == 200
-            
-            end_time = time.time()
-            total_time = end_time - start_time
-            total_times.append(total_time)
-        
-        # Calcul des statistiques
-        avg_time = statistics.mean(total_times)
-        max_time = max(total_times)
-        min_time = min(total_times)
         
-        print(f"\nTemps de réponse flux complet - Moy: {avg_time:.2f}s, Min: {min_time:.2f}s, Max: {max_time:.2f}s")
+        async def all_flows():
+            await asyncio.gather(*[complete_flow(prompt) for prompt in FLOW_PROMPTS])
         
-        # Vérification des seuils acceptables (ajuster selon le contexte réel)
-        assert avg_time < 15.0, f"Temps de réponse moyen trop élevé: {avg_time:.2f}s"
+        benchmark.pedantic(
+            lambda: runner.run(all_flows()),
+            rounds=5,
+            iterations=1,
+            warmup_rounds=1
+        )
+        benchmark.extra_info["prompt_count"] = len(FLOW_PROMPTS)
     
-    def test_batch_moderation_scaling(self):
+    async def test_batch_moderation_scaling(self, async_client, record_property):
         """
         Tester comment le temps de modération par lots évolue avec le nombre d'éléments.
         Cela permet de vérifier l'efficacité du traitement par lots.
+        Les mesures sont enregistrées comme propriétés du test (rapport JUnit XML) plutôt qu'affichées.
         """
         batch_sizes = [1, 2, 5, 10]
         avg_times_per_item = []
         
         base_text = "Ceci est un texte d'exemple pour tester la modération par lots. "
         
+        # Lot d'échauffement non chronométré, sinon le lot de taille 1 absorbe le coût du premier appel.
+        # Le texte diffère des lots mesurés pour ne pas pré-remplir le cache de résultats de modération.
+        warmup_response = await async_client.post(
+            "/moderation/moderate/batch",
+            json=["Texte d'échauffement avant les mesures."],
+            params={
+                "moderation_type": ModerationType.COMBINED.value
+            }
+        )
+        assert warmup_response.status_code == 200
+        
         for size in batch_sizes:
-            # Créer un lot de textes de la taille spécifiée
-            batch = [f"{base_text} Item {i+1}" for i in range(size)]
+            # Créer un lot de textes de la taille spécifiée. Les textes sont propres à chaque lot
+            # (taille incluse) : aucun n'est servi depuis le cache de résultats d'un lot précédent.
+            batch = [f"{base_text} Lot {size}, item {i+1}" for i in range(size)]
             
             start_time = time.time()
-            response = client.post(
+            response = await async_client.post(
                 "/moderation/moderate/batch",
                 json=batch,
                 params={
@@ -226,13 +356,14 @@ class TestAPIPerformance:
             time_per_item = total_time / size
             avg_times_per_item.append(time_per_item)
             
-            print(f"\nLot de taille {size}: Temps total {total_time:.2f}s, Temps par élément {time_per_item:.2f}s")
+            record_property(f"batch_{size}_total_time", total_time)
+            record_property(f"batch_{size}_time_per_item", time_per_item)
         
         # La modération par lots devrait être plus efficace (temps par élément diminue avec la taille du lot)
         # Cette assertion peut être ajustée en fonction du comportement réel de votre API
         if len(avg_times_per_item) > 1 and avg_times_per_item[0] > 0:
             efficiency = (avg_times_per_item[0] - avg_times_per_item[-1]) / avg_times_per_item[0]
-            print(f"Gain d'efficacité du traitement par lots: {efficiency:.2%}")
+            record_property("batch_efficiency", efficiency)
             
             # Le temps par élément devrait diminuer d'au moins 10% pour le plus grand lot par rapport au lot de 1
             assert efficiency > 0.1, "Le traitement par lots n'est pas suffisamment efficace"
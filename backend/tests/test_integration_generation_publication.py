@@ -2,8 +2,8 @@
 import os
 import pytest
 import asyncio
-from unittest.mock import AsyncMock, MagicMock, patch
-from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+from types import SimpleNamespace
 
 from app.generation.service import GenerationService
 from app.generation.models import (
@@ -17,56 +17,84 @@ from app.moderation.models import (
     ModerationType,
     ModerationResult
 )
+from app.publication.router import generate_and_publish_linkedin
 from app.publication.service import PublicationService
 from app.publication.models import (
+    PublicationRequest,
     SocialMediaPlatform,
     PublicationStatus,
     PublicationResult
 )
 
-# Test fixture for end-to-end workflow
-@pytest.fixture
+# Immutable test values built once (avoids re-running Pydantic validation in every test)
+_FROZEN_TS = "2024-01-01T00:00:00"
+_DEFAULT_PARAMS = GenerationParameters(
+    content_type=ContentType.LINKEDIN_POST,
+    prompt="Annonce du lancement de notre solution d'IA générative",
+    keywords=["IA", "Innovation", "Technologie"],
+    tone=ContentTone.PROFESSIONAL,
+    include_hashtags=True,
+    include_emojis=True
+)
+
+# Test fixture for end-to-end workflow, shared by the whole module (see reset_services)
+@pytest.fixture(scope="module")
 def services():
-    """Create service instances with mocked clients for integration testing."""
-    with patch("openai.OpenAI"), patch("anthropic.Anthropic"):
-        # Create generation service with mocked clients
+    """Create service instances with mocked SDK clients for integration testing."""
+    # Module-scoped fixture: the function-scoped monkeypatch fixture is not available here.
+    # The services import the SDK classes by name: patch them where they are looked up
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr("app.generation.service.OpenAI", MagicMock())
+        mp.setattr("app.generation.service.Anthropic", MagicMock())
+        mp.setattr("app.moderation.service.AsyncOpenAI", MagicMock())
+        mp.setattr("app.moderation.service.AsyncAnthropic", MagicMock())
+        
+        # Create generation service (clients are replaced in every test, see reset_services)
         gen_service = GenerationService()
-        gen_service.openai_client = MagicMock()
-        gen_service.anthropic_client = MagicMock()
         gen_service.openai_api_key = "fake-api-key"
         gen_service.anthropic_api_key = "fake-api-key"
         
-        # Create moderation service with mocked providers
+        # Create moderation service (providers are replaced in every test)
         mod_service = ModerationService()
-        mod_service.providers = {
-            ModerationType.OPENAI: MagicMock(),
-            ModerationType.ANTHROPIC: MagicMock(),
-            ModerationType.DETOXIFY: MagicMock(),
-            ModerationType.COMBINED: MagicMock()
-        }
         
-        # Create publication service with mocked clients
+        # Create publication service
         pub_service = PublicationService()
-        pub_service.linkedin_client = MagicMock()
-        pub_service.twitter_client = MagicMock()
-        pub_service.facebook_client = MagicMock()
         pub_service.linkedin_api_key = "fake-api-key"
         pub_service.twitter_api_key = "fake-api-key"
         pub_service.facebook_api_key = "fake-api-key"
         
-        return {
+        yield {
             "generation": gen_service,
             "moderation": mod_service,
             "publication": pub_service
         }
 
-# Mock response helpers
-def mock_openai_generation_response():
-    """Create a mock OpenAI generation response."""
-    chat_completion = MagicMock()
-    chat_completion.choices = [MagicMock()]
-    chat_completion.choices[0].message = MagicMock()
-    chat_completion.choices[0].message.content = """
+@pytest.fixture(autouse=True)
+def reset_services(services):
+    """Give each test fresh mocked clients, then restore the shared services so tests stay independent."""
+    # Tests replace service methods on the instances; keep the original attributes to restore them
+    snapshots = {name: dict(vars(service)) for name, service in services.items()}
+    
+    # New mocks for every test rather than reset_mock(return_value=True), which also resets
+    # the configured magic methods (bool(mock) would then raise TypeError)
+    services["generation"].openai_client = MagicMock()
+    services["generation"].anthropic_client = MagicMock()
+    services["moderation"].providers = {moderation_type: MagicMock() for moderation_type in ModerationType}
+    services["publication"].linkedin_client = MagicMock()
+    services["publication"].twitter_client = MagicMock()
+    services["publication"].facebook_client = MagicMock()
+    
+    yield
+    
+    for name, service in services.items():
+        vars(service).clear()
+        vars(service).update(snapshots[name])
+    
+    # A cached moderation result from one test must not leak into the next
+    services["moderation"].clear_cache()
+
+# Mock responses, built once at import time (tests only read them)
+_OPENAI_GENERATION_RESP = SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="""
     Nous sommes ravis d'annoncer le lancement de notre nouvelle solution de #IA générative ! 🚀
 
     Cette technologie innovante va transformer la manière dont vous créez du contenu et interagissez avec vos données. Avec notre solution, vous pouvez générer des textes de haute qualité, analyser des documents complexes et automatiser des tâches qui prenaient auparavant des heures.
@@ -74,212 +102,180 @@ def mock_openai_generation_response():
     Contactez-nous pour une démo gratuite !
 
     #IntelligenceArtificielle #Innovation #Technologie
-    """
-    return chat_completion
+    """))])
+
+_SAFE_RESULT = ModerationResult(
+    flagged=False,
+    categories={
+        "hate": False,
+        "harassment": False,
+        "self_harm": False,
+        "sexual": False,
+        "violence": False,
+        "profanity": False
+    },
+    category_scores={
+        "hate": 0.01,
+        "harassment": 0.01,
+        "self_harm": 0.01,
+        "sexual": 0.01,
+        "violence": 0.01,
+        "profanity": 0.01
+    },
+    provider="openai",
+    content_type="text"
+)
+
+_UNSAFE_RESULT = ModerationResult(
+    flagged=True,
+    categories={
+        "hate": False,
+        "harassment": True,
+        "self_harm": False,
+        "sexual": False,
+        "violence": False,
+        "profanity": True
+    },
+    category_scores={
+        "hate": 0.01,
+        "harassment": 0.75,
+        "self_harm": 0.01,
+        "sexual": 0.01,
+        "violence": 0.01,
+        "profanity": 0.85
+    },
+    provider="openai",
+    content_type="text"
+)
+
+_LINKEDIN_PUBLICATION_RESP = {
+    "platform_post_id": "linkedin-post-123",
+    "platform_post_url": "https://www.linkedin.com/posts/test-123"
+}
+
+# Mock response helpers
+def mock_openai_generation_response():
+    """Return the mock OpenAI generation response."""
+    return _OPENAI_GENERATION_RESP
 
 def mock_moderation_safe_response():
-    """Create a mock moderation response for safe content."""
-    return ModerationResult(
-        flagged=False,
-        categories={
-            "hate": False,
-            "harassment": False,
-            "self_harm": False,
-            "sexual": False,
-            "violence": False,
-            "profanity": False
-        },
-        category_scores={
-            "hate": 0.01,
-            "harassment": 0.01,
-            "self_harm": 0.01,
-            "sexual": 0.01,
-            "violence": 0.01,
-            "profanity": 0.01
-        },
-        provider="openai",
-        content_type="text"
-    )
+    """Return the mock moderation response for safe content."""
+    return _SAFE_RESULT
+
+def mock_linkedin_publication_response():
+    """Return the mock LinkedIn publication response."""
+    return _LINKEDIN_PUBLICATION_RESP
 
-def mock_moderation_unsafe_response():
-    """Create a mock moderation response for unsafe content."""
-    return ModerationResult(
-        flagged=True,
-        categories={
-            "hate": False,
-            "harassment": True,
-            "self_harm": False,
-            "sexual": False,
-            "violence": False,
-            "profanity": True
-        },
-        category_scores={
-            "hate": 0.01,
-            "harassment": 0.75,
-            "self_harm": 0.01,
-            "sexual": 0.01,
-            "violence": 0.01,
-            "profanity": 0.85
-        },
-        provider="openai",
-        content_type="text"
+async def _publish_to_linkedin_ok(publication_id, request, content):
+    """Stand in for PublicationService._publish_to_linkedin: a published result carrying the mock LinkedIn post."""
+    return PublicationResult(
+        publication_id=publication_id,
+        content_id=request.content_id,
+        platform=SocialMediaPlatform.LINKEDIN,
+        status=PublicationStatus.PUBLISHED,
+        publication_time=_FROZEN_TS,
+        **mock_linkedin_publication_response()
     )
 
-def mock_linkedin_publication_response():
-    """Create a mock LinkedIn publication response."""
-    return {
-        "platform_post_id": "linkedin-post-123",
-        "platform_post_url": "https://www.linkedin.com/posts/test-123"
-    }
+@pytest.fixture
+def moderation_outcome(request, services):
+    """Make the mocked COMBINED provider return the requested result; yields whether it is flagged."""
+    moderation_response = request.param
+    services["moderation"].providers[ModerationType.COMBINED].moderate_content = AsyncMock(
+        return_value=moderation_response
+    )
+    return moderation_response.flagged
 
 # Integration tests
 @pytest.mark.asyncio
-async def test_generate_moderate_publish_workflow_success(services):
-    """Test the full workflow: generation -> moderation -> publication (successful case)."""
-    # Mock the generation service
-    services["generation"].openai_client.chat.completions.create = AsyncMock(
+@pytest.mark.parametrize("moderation_outcome", [
+    pytest.param(_SAFE_RESULT, id="safe"),
+    pytest.param(_UNSAFE_RESULT, id="unsafe"),
+], indirect=True)
+async def test_generate_moderate_publish_workflow(services, moderation_outcome, monkeypatch):
+    """Test the workflow generation -> moderation -> publication; flagged content must not be published."""
+    # Mock the generation service (it calls the synchronous OpenAI client, without await)
+    services["generation"].openai_client.chat.completions.create = MagicMock(
         return_value=mock_openai_generation_response()
     )
     
-    # Mock the moderation service to indicate safe content
-    services["moderation"].providers[ModerationType.COMBINED].moderate_content = AsyncMock(
-        return_value=mock_moderation_safe_response()
-    )
-    
     # Mock the publication service to simulate successful posting
-    services["publication"]._publish_to_linkedin = AsyncMock(
-        return_value=mock_linkedin_publication_response()
-    )
+    services["publication"]._publish_to_linkedin = AsyncMock(side_effect=_publish_to_linkedin_ok)
     
-    # Step 1: Generate content
-    generation_params = GenerationParameters(
-        content_type=ContentType.LINKEDIN_POST,
-        prompt="Annonce du lancement de notre solution d'IA générative",
-        keywords=["IA", "Innovation", "Technologie"],
-        tone=ContentTone.PROFESSIONAL,
-        include_hashtags=True,
-        include_emojis=True
-    )
+    # The publication service looks contents up through the generation service module singleton:
+    # point it at this module's generation service, which stores what it generates
+    monkeypatch.setattr("app.publication.service.generation_service", services["generation"])
     
-    content = await services["generation"].generate_content(generation_params)
-    assert content is not None
+    # Step 1: Generate content
+    # model_copy gives the service its own instance without re-validating
+    content = await services["generation"].generate_content(_DEFAULT_PARAMS.model_copy())
     assert isinstance(content, GeneratedContent)
+    services["generation"].openai_client.chat.completions.create.assert_called_once()
     
     # Step 2: Moderate the content
     moderation_result = await services["moderation"].moderate_content(
         content=content.content,
         moderation_type=ModerationType.COMBINED
     )
-    assert moderation_result is not None
     assert isinstance(moderation_result, ModerationResult)
-    assert moderation_result.flagged is False
+    assert moderation_result.flagged is moderation_outcome
     
-    # Step 3: If content is safe, publish it
+    # Step 3: Publish only if the content is safe
     if not moderation_result.flagged:
-        # Store the content in the publication service's internal storage
-        services["publication"]._get_content_by_id = AsyncMock(return_value=content)
-        
-        publication_request = {
-            "content_id": content.content_id,
-            "platform": SocialMediaPlatform.LINKEDIN
-        }
+        publication_request = PublicationRequest(
+            content_id=content.content_id,
+            platform=SocialMediaPlatform.LINKEDIN
+        )
         
         publication_result = await services["publication"].publish_content(publication_request)
-        assert publication_result is not None
         assert isinstance(publication_result, PublicationResult)
+        assert publication_result.content_id == content.content_id
         assert publication_result.status == PublicationStatus.PUBLISHED
         assert publication_result.platform_post_url == "https://www.linkedin.com/posts/test-123"
+        services["publication"]._publish_to_linkedin.assert_called_once_with(
+            publication_result.publication_id, publication_request, content.content
+        )
     else:
-        pytest.fail("Content was incorrectly flagged as unsafe")
+        # Flagged content never reaches the platform
+        services["publication"]._publish_to_linkedin.assert_not_called()
 
 @pytest.mark.asyncio
-async def test_generate_moderate_publish_workflow_unsafe_content(services):
-    """Test the workflow where content is flagged as unsafe by moderation."""
-    # Mock the generation service
-    services["generation"].openai_client.chat.completions.create = AsyncMock(
+async def test_end_to_end_generate_and_publish(services, monkeypatch):
+    """Test the generate-and-publish LinkedIn route end to end, on the module's services."""
+    # Mock the generation service's synchronous OpenAI client
+    services["generation"].openai_client.chat.completions.create = MagicMock(
         return_value=mock_openai_generation_response()
     )
     
-    # Mock the moderation service to indicate unsafe content
-    services["moderation"].providers[ModerationType.COMBINED].moderate_content = AsyncMock(
-        return_value=mock_moderation_unsafe_response()
-    )
-    
-    # Step 1: Generate content
-    generation_params = GenerationParameters(
-        content_type=ContentType.LINKEDIN_POST,
-        prompt="Annonce du lancement de notre solution d'IA générative",
-        keywords=["IA", "Innovation", "Technologie"],
-        tone=ContentTone.PROFESSIONAL,
-        include_hashtags=True,
-        include_emojis=True
-    )
+    # Mock the publication service to simulate successful posting
+    services["publication"]._publish_to_linkedin = AsyncMock(side_effect=_publish_to_linkedin_ok)
     
-    content = await services["generation"].generate_content(generation_params)
-    assert content is not None
+    # The route imports the generation service at call time and publishes through the router's
+    # publication service, which looks the content up through its own generation service reference
+    monkeypatch.setattr("app.generation.service.generation_service", services["generation"])
+    monkeypatch.setattr("app.publication.service.generation_service", services["generation"])
+    monkeypatch.setattr("app.publication.router.publication_service", services["publication"])
     
-    # Step 2: Moderate the content
-    moderation_result = await services["moderation"].moderate_content(
-        content=content.content,
-        moderation_type=ModerationType.COMBINED
+    # Call the route handler directly
+    result = await generate_and_publish_linkedin(
+        prompt="Test integrated workflow",
+        keywords=["Test", "Integration"],
+        include_hashtags=True,
+        schedule_time=None
     )
-    assert moderation_result is not None
-    assert moderation_result.flagged is True
-    
-    # Step 3: Content should not be published if it's unsafe
-    if moderation_result.flagged:
-        # Verify that we don't proceed with publication
-        # We could add code here to handle unsafe content (e.g., logging, alerting, etc.)
-        print("Content was flagged as unsafe and not published")
-    else:
-        # If we get here, it means the content wasn't properly flagged
-        pytest.fail("Unsafe content was not flagged correctly")
-
-@pytest.mark.asyncio
-async def test_end_to_end_generate_and_publish(services):
-    """Test the end-to-end generate_and_publish method with moderation."""
-    # Mock the generation service
-    services["generation"].generate_content = AsyncMock(return_value=GeneratedContent(
-        content_id="test-content-456",
-        content_type=ContentType.LINKEDIN_POST,
-        content="Contenu de test généré pour LinkedIn #IA #Technologie",
-        hashtags=["#IA", "#Technologie"],
-        parameters=GenerationParameters(
-            content_type=ContentType.LINKEDIN_POST,
-            prompt="Test post"
-        ),
-        created_at=datetime.now().isoformat()
-    ))
     
-    # Mock the moderation service
-    services["moderation"].moderate_content = AsyncMock(return_value=mock_moderation_safe_response())
+    # Assertions
+    assert isinstance(result, PublicationResult)
+    assert result.platform == SocialMediaPlatform.LINKEDIN
+    assert result.status == PublicationStatus.PUBLISHED
     
-    # Mock the publication service methods
-    services["publication"]._publish_to_linkedin = AsyncMock(return_value=mock_linkedin_publication_response())
+    # The published content is the one generated from the route's parameters
+    generated = services["generation"]._generated_contents[result.content_id]
+    assert generated.content_type == ContentType.LINKEDIN_POST
+    assert generated.parameters.keywords == ["Test", "Integration"]
+    assert generated.parameters.tone == ContentTone.PROFESSIONAL
     
-    # Replace references to the original services with our mocked ones
-    with patch("app.publication.service.generation_service", services["generation"]), \
-         patch("app.publication.service.moderation_service", services["moderation"]):
-        
-        # Call the generate_and_publish method
-        result = await services["publication"].generate_and_publish(
-            platform=SocialMediaPlatform.LINKEDIN,
-            generation_params=GenerationParameters(
-                content_type=ContentType.LINKEDIN_POST,
-                prompt="Test integrated workflow",
-                keywords=["Test", "Integration"],
-                tone=ContentTone.PROFESSIONAL
-            )
-        )
-        
-        # Assertions
-        assert "generation_result" in result
-        assert "publication_result" in result
-        assert "moderation_result" in result
-        assert not result["moderation_result"].flagged
-        assert result["publication_result"].status == PublicationStatus.PUBLISHED
-        
-        # Verify methods were called
-        services["generation"].generate_content.assert_called_once()
-        services["moderation"].moderate_content.assert_called_once()
-        services["publication"]._publish_to_linkedin.assert_called_once()
+    # Verify methods were called
+    services["generation"].openai_client.chat.completions.create.assert_called_once()
+    services["publication"]._publish_to_linkedin.assert_called_once()
+    assert services["publication"]._publish_to_linkedin.call_args.args[2] == generated.content
@@ -1,113 +1,150 @@
 # backend/tests/test_integration_services.py
 import pytest
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import AsyncMock, patch
 import json
-from datetime import datetime
+from types import SimpleNamespace
 
-from app.generation.service import GenerationService
 from app.generation.models import ContentType, ContentTone, GenerationParameters, GeneratedContent
-from app.moderation.service import ModerationService, ModerationType
+from app.moderation.service import ModerationType
 from app.moderation.models import ModerationResult, ToxicityCategory, ContentType as ModerationContentType
-from app.publication.service import PublicationService
 from app.publication.models import PublicationResult, PublicationStatus, SocialMediaPlatform, DirectPublicationRequest
 
 # Exemple de données d'entrée
 TEST_PROMPT = "Générer un post sur les avantages du développement durable"
 TEST_CONTENT = "Le développement durable offre de nombreux avantages pour notre planète et les générations futures."
-TEST_UNSAFE_CONTENT = "Contenu inapproprié qui devrait être détecté par la modération."
 
-@pytest.fixture
+# Valeurs immuables construites une seule fois (évite de revalider les modèles Pydantic à chaque test)
+_FROZEN_TS = "2024-01-01T00:00:00"
+_DEFAULT_PARAMS = GenerationParameters(
+    prompt=TEST_PROMPT,
+    content_type=ContentType.LINKEDIN_POST,
+    tone=ContentTone.PROFESSIONAL
+)
+_SAFE_MODERATION = ModerationResult(
+    flagged=False,
+    categories={
+        ToxicityCategory.HATE: False,
+        ToxicityCategory.HARASSMENT: False,
+        ToxicityCategory.SELF_HARM: False,
+        ToxicityCategory.SEXUAL: False,
+        ToxicityCategory.VIOLENCE: False,
+        ToxicityCategory.PROFANITY: False
+    },
+    category_scores={
+        ToxicityCategory.HATE: 0.01,
+        ToxicityCategory.HARASSMENT: 0.01,
+        ToxicityCategory.SELF_HARM: 0.01,
+        ToxicityCategory.SEXUAL: 0.01,
+        ToxicityCategory.VIOLENCE: 0.01,
+        ToxicityCategory.PROFANITY: 0.01
+    },
+    provider="combined",
+    content_type=ModerationContentType.TEXT
+)
+_UNSAFE_MODERATION = ModerationResult(
+    flagged=True,
+    categories={
+        ToxicityCategory.HATE: True,
+        ToxicityCategory.HARASSMENT: False,
+        ToxicityCategory.SELF_HARM: False,
+        ToxicityCategory.SEXUAL: False,
+        ToxicityCategory.VIOLENCE: False,
+        ToxicityCategory.PROFANITY: False
+    },
+    category_scores={
+        ToxicityCategory.HATE: 0.85,
+        ToxicityCategory.HARASSMENT: 0.01,
+        ToxicityCategory.SELF_HARM: 0.01,
+        ToxicityCategory.SEXUAL: 0.01,
+        ToxicityCategory.VIOLENCE: 0.01,
+        ToxicityCategory.PROFANITY: 0.01
+    },
+    provider="combined",
+    content_type=ModerationContentType.TEXT
+)
+
+@pytest.fixture(scope="module")
 def mock_generation_service():
     """Create a mocked GenerationService."""
-    service = MagicMock(spec=GenerationService)
-    service.generate_content = AsyncMock()
-    service.generate_content.return_value = GeneratedContent(
-        content_id="test-content-id",
-        content_type=ContentType.LINKEDIN_POST,
-        content=TEST_CONTENT,
-        variants=None,
-        hashtags=["#développementdurable", "#environnement"],
-        title=None,
-        summary=None,
-        parameters=GenerationParameters(
-            prompt=TEST_PROMPT,
+    return SimpleNamespace(
+        generate_content=AsyncMock(return_value=GeneratedContent(
+            content_id="test-content-id",
             content_type=ContentType.LINKEDIN_POST,
-            tone=ContentTone.PROFESSIONAL
-        ),
-        created_at=datetime.now().isoformat(),
-        metadata=None
+            content=TEST_CONTENT,
+            variants=None,
+            hashtags=["#développementdurable", "#environnement"],
+            title=None,
+            summary=None,
+            parameters=_DEFAULT_PARAMS,
+            created_at=_FROZEN_TS,
+            metadata=None
+        ))
     )
-    return service
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def mock_moderation_service():
     """Create a mocked ModerationService."""
-    service = MagicMock(spec=ModerationService)
-    service.moderate_content = AsyncMock()
-    
     # Par défaut, retourne un contenu sûr
-    service.moderate_content.return_value = ModerationResult(
-        flagged=False,
-        categories={
-            ToxicityCategory.HATE: False,
-            ToxicityCategory.HARASSMENT: False,
-            ToxicityCategory.SELF_HARM: False,
-            ToxicityCategory.SEXUAL: False,
-            ToxicityCategory.VIOLENCE: False,
-            ToxicityCategory.PROFANITY: False
-        },
-        category_scores={
-            ToxicityCategory.HATE: 0.01,
-            ToxicityCategory.HARASSMENT: 0.01,
-            ToxicityCategory.SELF_HARM: 0.01,
-            ToxicityCategory.SEXUAL: 0.01,
-            ToxicityCategory.VIOLENCE: 0.01,
-            ToxicityCategory.PROFANITY: 0.01
-        },
-        provider="combined",
-        content_type=ModerationContentType.TEXT
+    return SimpleNamespace(
+        moderate_content=AsyncMock(return_value=_SAFE_MODERATION)
     )
-    return service
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def mock_publication_service():
     """Create a mocked PublicationService."""
-    service = MagicMock(spec=PublicationService)
-    service.direct_publish = AsyncMock()
-    service.direct_publish.return_value = PublicationResult(
-        publication_id="test-publication-id",
-        content_id="test-content-id",
-        platform=SocialMediaPlatform.LINKEDIN,
-        platform_post_url="https://linkedin.com/post/12345",
-        platform_post_id="12345",
-        status=PublicationStatus.PUBLISHED,
-        publication_time=datetime.now().isoformat(),
-        error_message=None
+    return SimpleNamespace(
+        direct_publish=AsyncMock(return_value=PublicationResult(
+            publication_id="test-publication-id",
+            content_id="test-content-id",
+            platform=SocialMediaPlatform.LINKEDIN,
+            platform_post_url="https://linkedin.com/post/12345",
+            platform_post_id="12345",
+            status=PublicationStatus.PUBLISHED,
+            publication_time=_FROZEN_TS,
+            error_message=None
+        ))
     )
-    return service
+
+@pytest.fixture(autouse=True)
+def reset_service_mocks(mock_generation_service, mock_moderation_service, mock_publication_service):
+    """Reset the module-scoped service mocks after each test, keeping their default return values."""
+    mocked_methods = [
+        mock_generation_service.generate_content,
+        mock_moderation_service.moderate_content,
+        mock_publication_service.direct_publish
+    ]
+    default_return_values = [method.return_value for method in mocked_methods]
+    
+    yield
+    
+    for method, return_value in zip(mocked_methods, default_return_values):
+        method.reset_mock()
+        method.return_value = return_value
+
+@pytest.fixture
+def moderation_outcome(request, mock_moderation_service):
+    """Configurer le résultat renvoyé par la modération simulée ; renvoie s'il est signalé."""
+    mock_moderation_service.moderate_content.return_value = request.param
+    return request.param.flagged
 
 @pytest.mark.asyncio
-async def test_full_generation_moderation_publication_flow(
-    mock_generation_service, mock_moderation_service, mock_publication_service):
-    """Test the complete flow: Generation -> Moderation -> Publication."""
+@pytest.mark.parametrize("moderation_outcome", [
+    pytest.param(_SAFE_MODERATION, id="safe"),
+    pytest.param(_UNSAFE_MODERATION, id="unsafe"),
+], indirect=True)
+async def test_generation_moderation_publication_flow(
+    mock_generation_service, mock_moderation_service, mock_publication_service, moderation_outcome):
+    """Test du flux Génération -> Modération -> Publication : un contenu signalé n'est jamais publié."""
     
     # 1. Génération de contenu
-    parameters = GenerationParameters(
-        prompt=TEST_PROMPT,
-        content_type=ContentType.LINKEDIN_POST,
-        tone=ContentTone.PROFESSIONAL
-    )
-    
-    generation_result = await mock_generation_service.generate_content(parameters)
+    generation_result = await mock_generation_service.generate_content(_DEFAULT_PARAMS)
     
     # 2. Modération du contenu généré
     moderation_result = await mock_moderation_service.moderate_content(
         generation_result.content,
         moderation_type=ModerationType.COMBINED
     )
-    
-    # Vérification que le contenu est approprié
-    assert moderation_result.flagged is False, "Le contenu généré a été signalé comme inapproprié"
+    assert moderation_result.flagged is moderation_outcome
     
     # 3. Publication du contenu si approprié
     if not moderation_result.flagged:
@@ -121,74 +158,6 @@ async def test_full_generation_moderation_publication_flow(
         
         # Vérification de la publication
         assert publication_result.status == PublicationStatus.PUBLISHED
-        assert publication_result.platform_post_id is not None
-        assert publication_result.platform_post_url is not None
-
-@pytest.mark.asyncio
-async def test_moderation_blocking_inappropriate_content(
-    mock_generation_service, mock_moderation_service, mock_publication_service):
-    """Test que la modération bloque la publication de contenu inapproprié."""
-    
-    # 1. Configuration du mock pour générer du contenu inapproprié
-    mock_generation_service.generate_content.return_value = GeneratedContent(
-        content_id="test-unsafe-content-id",
-        content_type=ContentType.LINKEDIN_POST,
-        content=TEST_UNSAFE_CONTENT,
-        variants=None,
-        hashtags=["#test"],
-        title=None,
-        summary=None,
-        parameters=GenerationParameters(
-            prompt="Générer un post controversé",
-            content_type=ContentType.LINKEDIN_POST,
-            tone=ContentTone.SERIOUS
-        ),
-        created_at=datetime.now().isoformat(),
-        metadata=None
-    )
-    
-    # 2. Configuration du mock pour signaler le contenu comme inapproprié
-    mock_moderation_service.moderate_content.return_value = ModerationResult(
-        flagged=True,
-        categories={
-            ToxicityCategory.HATE: True,
-            ToxicityCategory.HARASSMENT: False,
-            ToxicityCategory.SELF_HARM: False,
-            ToxicityCategory.SEXUAL: False,
-            ToxicityCategory.VIOLENCE: False,
-            ToxicityCategory.PROFANITY: False
-        },
-        category_scores={
-            ToxicityCategory.HATE: 0.85,
-            ToxicityCategory.HARASSMENT: 0.01,
-            ToxicityCategory.SELF_HARM: 0.01,
-            ToxicityCategory.SEXUAL: 0.01,
-            ToxicityCategory.VIOLENCE: 0.01,
-            ToxicityCategory.PROFANITY: 0.01
-        },
-        provider="combined",
-        content_type=ModerationContentType.TEXT
-    )
-    
-    # 3. Génération de contenu
-    parameters = GenerationParameters(
-        prompt="Générer un post controversé",
-        content_type=ContentType.LINKEDIN_POST,
-        tone=ContentTone.SERIOUS
-    )
-    
-    generation_result = await mock_generation_service.generate_content(parameters)
-    
-    # 4. Modération du contenu généré
-    moderation_result = await mock_moderation_service.moderate_content(
-        generation_result.content,
-        moderation_type=ModerationType.COMBINED
-    )
-    
-    # 5. Vérification que le contenu est identifié comme inapproprié
-    assert moderation_result.flagged is True
-    assert moderation_result.categories.get(ToxicityCategory.HATE) is True
-    
-    # 6. Le contenu ne devrait pas être publié
-    # Vérification que le service de publication n'a pas été appelé
-    mock_publication_service.direct_publish.assert_not_called()
+    else:
+        # Vérification que le service de publication n'a pas été appelé
+        mock_publication_service.direct_publish.assert_not_called()
@@ -1,11 +1,7 @@
 # backend/tests/test_main.py
-from fastapi.testclient import TestClient
-from app.main import app # Correction: app.main au lieu de ..app.main
 from app.config import settings
 
-client = TestClient(app)
-
-def test_health_check():
+def test_health_check(client):
     response = client.get("/health")
     assert response.status_code == 200
     assert response.json() == {
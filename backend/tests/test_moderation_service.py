@@ -2,10 +2,19 @@
 import os
 import pytest
 import asyncio
+import time
 from unittest.mock import AsyncMock, MagicMock, patch
-import json
+import orjson
+import httpx
+import openai
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from types import MappingProxyType
 
 from app.moderation.service import (
+    _DETOXIFY_MODELS,
+    _load_detoxify_model,
+    _TokenBucket,
     ModerationService,
     OpenAIModerationProvider,
     AnthropicModerationProvider,
@@ -20,6 +29,14 @@ from app.moderation.models import (
 )
 
 # Test fixtures
+@pytest.fixture(scope="module", autouse=True)
+def _patch_sdks():
+    """Stub the SDK constructors once for the whole module so no provider builds a real client or model."""
+    with patch("app.moderation.service.AsyncOpenAI"), \
+         patch("app.moderation.service.AsyncAnthropic"), \
+         patch("app.moderation.service.Detoxify"):
+        yield
+
 @pytest.fixture
 def moderation_service():
     """Create a ModerationService instance with mocked providers."""
@@ -36,28 +53,25 @@ def moderation_service():
 @pytest.fixture
 def openai_provider():
     """Create a mocked OpenAIModerationProvider."""
-    with patch("openai.OpenAI"):
-        provider = OpenAIModerationProvider()
-        provider.client = MagicMock()
-        provider.api_key = "fake-api-key"
-        return provider
+    provider = OpenAIModerationProvider()
+    provider.client = MagicMock()
+    provider.api_key = "fake-api-key"
+    return provider
 
 @pytest.fixture
 def anthropic_provider():
     """Create a mocked AnthropicModerationProvider."""
-    with patch("anthropic.Anthropic"):
-        provider = AnthropicModerationProvider()
-        provider.client = MagicMock()
-        provider.api_key = "fake-api-key"
-        return provider
+    provider = AnthropicModerationProvider()
+    provider.client = MagicMock()
+    provider.api_key = "fake-api-key"
+    return provider
 
 @pytest.fixture
 def detoxify_provider():
     """Create a mocked DetoxifyModerationProvider."""
-    with patch("detoxify.Detoxify"):
-        provider = DetoxifyModerationProvider()
-        provider._model_instance = MagicMock()
-        return provider
+    provider = DetoxifyModerationProvider()
+    provider._model_instance = MagicMock()
+    return provider
 
 @pytest.fixture
 def combined_provider():
@@ -70,56 +84,76 @@ def combined_provider():
     }
     return provider
 
+# Read-only templates covering every category; copy with dict(...) or {**template, ...} before use
+_ALL_SAFE_CATEGORIES = MappingProxyType({category: False for category in ToxicityCategory})
+_ALL_SAFE_SCORES = MappingProxyType({category: 0.01 for category in ToxicityCategory})
+
+# Mock assertion helper: a plain call_count check, with the recorded calls in the failure message
+def _called_once(mock):
+    assert mock.call_count == 1, f"{mock} calls={mock.call_args_list}"
+
 # Sample data
 SAFE_TEXT = "Ceci est un texte normal qui ne devrait pas être signalé."
 UNSAFE_TEXT = "Ceci est un texte contenant des insultes et des menaces qui mérite d'être signalé!"
 
-# Helper functions to mock API responses
-def mock_openai_moderation_response(is_flagged=False):
-    """Create a mock OpenAI moderation response."""
-    response = MagicMock()
-    result = MagicMock()
-    result.flagged = is_flagged
-    
-    # Mock the categories and scores
-    categories = MagicMock()
-    categories.model_dump.return_value = {
-        "hate": is_flagged,
-        "harassment": is_flagged,
-        "self-harm": False,
-        "sexual": False,
-        "violence": False,
-        "profanity": is_flagged
-    }
-    
-    scores = MagicMock()
-    scores.model_dump.return_value = {
-        "hate": 0.8 if is_flagged else 0.01,
-        "harassment": 0.7 if is_flagged else 0.02,
-        "self-harm": 0.01,
-        "sexual": 0.01,
-        "violence": 0.02,
-        "profanity": 0.9 if is_flagged else 0.03
-    }
-    
-    result.categories = categories
-    result.category_scores = scores
-    
-    response.results = [result]
-    response.model_dump = MagicMock(return_value={"results": [{"flagged": is_flagged}]})
-    
-    # Mock moderation.create method to return this response
-    moderation_create = MagicMock()
-    moderation_create.create = MagicMock(return_value=response)
+# Fake API responses: plain frozen dataclasses exposing only what the providers read.
+# Built once at import time; much cheaper than nested MagicMock trees rebuilt in every test.
+@dataclass(frozen=True, slots=True)
+class _FakeOAIScores:
+    values: dict
+    
+    def model_dump(self):
+        return dict(self.values)
+
+@dataclass(frozen=True, slots=True)
+class _FakeOAIResult:
+    flagged: bool
+    categories: _FakeOAIScores
+    category_scores: _FakeOAIScores
+
+@dataclass(frozen=True, slots=True)
+class _FakeOAIResponse:
+    results: tuple
     
-    return response
+    def model_dump(self):
+        return {"results": [{"flagged": result.flagged} for result in self.results]}
 
-def mock_anthropic_moderation_response(is_flagged=False):
-    """Create a mock Anthropic moderation response."""
-    response = MagicMock()
-    content = MagicMock()
+@dataclass(frozen=True, slots=True)
+class _FakeAnthropicContent:
+    text: str
+
+@dataclass(frozen=True, slots=True)
+class _FakeAnthropicMessage:
+    content: tuple
     
-    json_response = {
+    def model_dump(self):
+        return {"content": [{"text": block.text} for block in self.content]}
+
+def _build_openai_response(is_flagged):
+    """Build a fake OpenAI moderation response."""
+    return _FakeOAIResponse(results=(_FakeOAIResult(
+        flagged=is_flagged,
+        categories=_FakeOAIScores({
+            "hate": is_flagged,
+            "harassment": is_flagged,
+            "self-harm": False,
+            "sexual": False,
+            "violence": False,
+            "profanity": is_flagged
+        }),
+        category_scores=_FakeOAIScores({
+            "hate": 0.8 if is_flagged else 0.01,
+            "harassment": 0.7 if is_flagged else 0.02,
+            "self-harm": 0.01,
+            "sexual": 0.01,
+            "violence": 0.02,
+            "profanity": 0.9 if is_flagged else 0.03
+        })
+    ),))
+
+def _anthropic_payload(is_flagged):
+    """Build the moderation JSON payload Claude is asked to return."""
+    return {
         "flagged": is_flagged,
         "categories": {
             "hate": is_flagged,
@@ -139,15 +173,15 @@ def mock_anthropic_moderation_response(is_flagged=False):
         },
         "explanation": "Ce contenu contient du harcèlement et des insultes" if is_flagged else "Ce contenu est sûr"
     }
-    
-    content.text = json.dumps(json_response)
-    response.content = [content]
-    response.model_dump = MagicMock(return_value={"content": [{"text": json.dumps(json_response)}]})
-    
-    return response
 
-def mock_detoxify_prediction(is_flagged=False):
-    """Create a mock Detoxify prediction."""
+# Encoded once; the fake messages and their model_dump() share these strings
+_ANTHROPIC_JSON = {
+    is_flagged: orjson.dumps(_anthropic_payload(is_flagged)).decode()
+    for is_flagged in (False, True)
+}
+
+def _build_detoxify_prediction(is_flagged):
+    """Build a fake Detoxify prediction."""
     return {
         "toxicity": 0.9 if is_flagged else 0.05,
         "severe_toxicity": 0.7 if is_flagged else 0.01,
@@ -158,118 +192,145 @@ def mock_detoxify_prediction(is_flagged=False):
         "sexual_explicit": 0.1 if is_flagged else 0.01
     }
 
+_SAFE_OAI = _build_openai_response(is_flagged=False)
+_UNSAFE_OAI = _build_openai_response(is_flagged=True)
+_SAFE_ANTHROPIC = _FakeAnthropicMessage(content=(_FakeAnthropicContent(text=_ANTHROPIC_JSON[False]),))
+_UNSAFE_ANTHROPIC = _FakeAnthropicMessage(content=(_FakeAnthropicContent(text=_ANTHROPIC_JSON[True]),))
+_SAFE_DETOXIFY = _build_detoxify_prediction(is_flagged=False)
+_UNSAFE_DETOXIFY = _build_detoxify_prediction(is_flagged=True)
+
+# Helper functions returning the prebuilt API responses
+def mock_openai_moderation_response(is_flagged=False):
+    """Return the fake OpenAI moderation response."""
+    return _UNSAFE_OAI if is_flagged else _SAFE_OAI
+
+def mock_anthropic_moderation_response(is_flagged=False):
+    """Return the fake Anthropic moderation response."""
+    return _UNSAFE_ANTHROPIC if is_flagged else _SAFE_ANTHROPIC
+
+def mock_detoxify_prediction(is_flagged=False):
+    """Return the fake Detoxify prediction."""
+    return _UNSAFE_DETOXIFY if is_flagged else _SAFE_DETOXIFY
+
 # Tests for ModerationService
 @pytest.mark.asyncio
-async def test_moderate_content_openai_safe(openai_provider):
-    """Test moderation of safe content with OpenAI provider."""
+@pytest.mark.parametrize("is_flagged", [False, True], ids=["safe", "unsafe"])
+async def test_moderate_content_openai(openai_provider, is_flagged):
+    """Test moderation of safe and unsafe content with OpenAI provider."""
     # Mock the OpenAI client's response
-    openai_response = mock_openai_moderation_response(is_flagged=False)
-    openai_provider.client.moderations.create = MagicMock(return_value=openai_response)
+    openai_provider.client.moderations.create = AsyncMock(
+        return_value=mock_openai_moderation_response(is_flagged=is_flagged)
+    )
     
     # Call the moderate_content method
-    result = await openai_provider.moderate_content(SAFE_TEXT)
+    result = await openai_provider.moderate_content(UNSAFE_TEXT if is_flagged else SAFE_TEXT)
     
     # Assertions
     assert isinstance(result, ModerationResult)
-    assert result.flagged is False
+    assert result.flagged is is_flagged
+    assert any(result.categories.values()) is is_flagged
     assert result.provider == "openai"
     assert result.content_type == ContentType.TEXT
     
-    # Verify client was called with expected parameters
-    openai_provider.client.moderations.create.assert_called_once()
-
-@pytest.mark.asyncio
-async def test_moderate_content_openai_unsafe(openai_provider):
-    """Test moderation of unsafe content with OpenAI provider."""
-    # Mock the OpenAI client's response
-    openai_response = mock_openai_moderation_response(is_flagged=True)
-    openai_provider.client.moderations.create = MagicMock(return_value=openai_response)
-    
-    # Call the moderate_content method
-    result = await openai_provider.moderate_content(UNSAFE_TEXT)
-    
-    # Assertions
-    assert isinstance(result, ModerationResult)
-    assert result.flagged is True
-    assert any(flagged for flagged in result.categories.values())
-    assert result.provider == "openai"
-    
     # Verify client was called
-    openai_provider.client.moderations.create.assert_called_once()
+    _called_once(openai_provider.client.moderations.create)
 
 @pytest.mark.asyncio
-async def test_moderate_content_anthropic_safe(anthropic_provider):
-    """Test moderation of safe content with Anthropic provider."""
+@pytest.mark.parametrize("is_flagged", [False, True], ids=["safe", "unsafe"])
+async def test_moderate_content_anthropic(anthropic_provider, is_flagged):
+    """Test moderation of safe and unsafe content with Anthropic provider."""
     # Mock the Anthropic client's response
-    anthropic_response = mock_anthropic_moderation_response(is_flagged=False)
-    anthropic_provider.client.messages.create = MagicMock(return_value=anthropic_response)
-    
-    # Call the moderate_content method
-    result = await anthropic_provider.moderate_content(SAFE_TEXT)
-    
-    # Assertions
-    assert isinstance(result, ModerationResult)
-    assert result.flagged is False
-    assert not any(result.categories.values())
-    assert result.provider == "anthropic"
-    
-    # Verify client was called
-    anthropic_provider.client.messages.create.assert_called_once()
-
-@pytest.mark.asyncio
-async def test_moderate_content_anthropic_unsafe(anthropic_provider):
-    """Test moderation of unsafe content with Anthropic provider."""
-    # Mock the Anthropic client's response
-    anthropic_response = mock_anthropic_moderation_response(is_flagged=True)
-    anthropic_provider.client.messages.create = MagicMock(return_value=anthropic_response)
+    anthropic_provider.client.messages.create = AsyncMock(
+        return_value=mock_anthropic_moderation_response(is_flagged=is_flagged)
+    )
     
     # Call the moderate_content method
-    result = await anthropic_provider.moderate_content(UNSAFE_TEXT)
+    result = await anthropic_provider.moderate_content(UNSAFE_TEXT if is_flagged else SAFE_TEXT)
     
     # Assertions
     assert isinstance(result, ModerationResult)
-    assert result.flagged is True
-    assert any(flagged for flagged in result.categories.values())
+    assert result.flagged is is_flagged
+    assert any(result.categories.values()) is is_flagged
     assert result.provider == "anthropic"
     
     # Verify client was called
-    anthropic_provider.client.messages.create.assert_called_once()
+    _called_once(anthropic_provider.client.messages.create)
 
 @pytest.mark.asyncio
-async def test_moderate_content_detoxify_safe(detoxify_provider):
-    """Test moderation of safe content with Detoxify provider."""
+@pytest.mark.parametrize("is_flagged", [False, True], ids=["safe", "unsafe"])
+async def test_moderate_content_detoxify(detoxify_provider, is_flagged):
+    """Test moderation of safe and unsafe content with Detoxify provider."""
     # Mock the Detoxify model's prediction
-    detoxify_provider.model.predict = MagicMock(return_value=mock_detoxify_prediction(is_flagged=False))
+    detoxify_provider.model.predict = MagicMock(return_value=mock_detoxify_prediction(is_flagged=is_flagged))
     
     # Call the moderate_content method
-    result = await detoxify_provider.moderate_content(SAFE_TEXT)
+    result = await detoxify_provider.moderate_content(UNSAFE_TEXT if is_flagged else SAFE_TEXT)
     
     # Assertions
     assert isinstance(result, ModerationResult)
-    assert result.flagged is False
-    assert not any(result.categories.values())
+    assert result.flagged is is_flagged
+    assert any(result.categories.values()) is is_flagged
     assert result.provider == "detoxify"
     
     # Verify model was called
-    detoxify_provider.model.predict.assert_called_once()
+    _called_once(detoxify_provider.model.predict)
 
 @pytest.mark.asyncio
-async def test_moderate_content_detoxify_unsafe(detoxify_provider):
-    """Test moderation of unsafe content with Detoxify provider."""
-    # Mock the Detoxify model's prediction
-    detoxify_provider.model.predict = MagicMock(return_value=mock_detoxify_prediction(is_flagged=True))
+async def test_detoxify_does_not_block_event_loop(detoxify_provider):
+    """Test that Detoxify inference runs off the event loop so other coroutines keep running."""
+    events = []
     
-    # Call the moderate_content method
-    result = await detoxify_provider.moderate_content(UNSAFE_TEXT)
+    def slow_predict(text):
+        time.sleep(0.05)
+        events.append("predict-end")
+        return _SAFE_DETOXIFY
     
-    # Assertions
-    assert isinstance(result, ModerationResult)
-    assert result.flagged is True
-    assert any(flagged for flagged in result.categories.values())
-    assert result.provider == "detoxify"
+    async def ticker():
+        await asyncio.sleep(0.001)
+        events.append("tick")
     
-    # Verify model was called
-    detoxify_provider.model.predict.assert_called_once()
+    detoxify_provider.model.predict = slow_predict
+    
+    await asyncio.gather(detoxify_provider.moderate_content(SAFE_TEXT), ticker())
+    
+    # A blocking predict would run to completion before the ticker gets a chance to run
+    assert events == ["tick", "predict-end"]
+
+@pytest.mark.asyncio
+async def test_detoxify_moderate_batch_vectorized(detoxify_provider):
+    """Test that Detoxify scores a whole batch in one predict call and thresholds every row."""
+    texts = [UNSAFE_TEXT if i % 4 == 0 else SAFE_TEXT for i in range(32)]
+    # On a list, Detoxify returns one list of scores per category
+    batch_prediction = {
+        category: [_UNSAFE_DETOXIFY[category] if text == UNSAFE_TEXT else _SAFE_DETOXIFY[category] for text in texts]
+        for category in _SAFE_DETOXIFY
+    }
+    detoxify_provider.model.predict = MagicMock(return_value=batch_prediction)
+    
+    results = await detoxify_provider.moderate_batch(texts)
+    
+    detoxify_provider.model.predict.assert_called_once_with(texts)
+    assert len(results) == len(texts)
+    assert [result.flagged for result in results] == [text == UNSAFE_TEXT for text in texts]
+    # Same scores as the single-text path
+    detoxify_provider.model.predict = MagicMock(return_value=_UNSAFE_DETOXIFY)
+    single = await detoxify_provider.moderate_content(UNSAFE_TEXT)
+    assert results[0].category_scores == single.category_scores
+    assert results[0].categories == single.categories
+
+def test_detoxify_model_loaded_once_under_concurrent_cold_calls():
+    """Test that concurrent first calls for the same model type load the Detoxify weights only once."""
+    def slow_load(model_type):
+        time.sleep(0.05)  # Leave every thread time to miss the cache
+        return MagicMock()
+    
+    with patch("app.moderation.service.Detoxify", side_effect=slow_load) as detoxify_cls, \
+         patch.dict(_DETOXIFY_MODELS, clear=True):
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            models = list(executor.map(_load_detoxify_model, ["unbiased"] * 8))
+    
+    detoxify_cls.assert_called_once_with(model_type="unbiased")
+    assert all(model is models[0] for model in models)
 
 @pytest.mark.asyncio
 async def test_moderate_content_combined_all_safe(combined_provider):
@@ -278,22 +339,8 @@ async def test_moderate_content_combined_all_safe(combined_provider):
     for provider_name, provider in combined_provider.providers.items():
         provider.moderate_content = AsyncMock(return_value=ModerationResult(
             flagged=False,
-            categories={
-                ToxicityCategory.HATE: False,
-                ToxicityCategory.HARASSMENT: False,
-                ToxicityCategory.SELF_HARM: False,
-                ToxicityCategory.SEXUAL: False,
-                ToxicityCategory.VIOLENCE: False,
-                ToxicityCategory.PROFANITY: False
-            },
-            category_scores={
-                ToxicityCategory.HATE: 0.01,
-                ToxicityCategory.HARASSMENT: 0.02,
-                ToxicityCategory.SELF_HARM: 0.01,
-                ToxicityCategory.SEXUAL: 0.01,
-                ToxicityCategory.VIOLENCE: 0.01,
-                ToxicityCategory.PROFANITY: 0.02
-            },
+            categories=dict(_ALL_SAFE_CATEGORIES),
+            category_scores=dict(_ALL_SAFE_SCORES),
             provider=provider_name,
             content_type=ContentType.TEXT
         ))
@@ -306,10 +353,10 @@ async def test_moderate_content_combined_all_safe(combined_provider):
     assert result.flagged is False
     assert not any(result.categories.values())
     assert result.provider == "combined"
+    assert result._complete is True
     
-    # Verify providers were called
-    for provider in combined_provider.providers.values():
-        assert provider.moderate_content.called
+    # Verify each provider was awaited exactly once
+    assert all(p.moderate_content.call_count == 1 for p in combined_provider.providers.values())
 
 @pytest.mark.asyncio
 async def test_moderate_content_combined_one_flags(combined_provider):
@@ -317,24 +364,24 @@ async def test_moderate_content_combined_one_flags(combined_provider):
     # Mock each provider to return different results
     combined_provider.providers["openai"].moderate_content = AsyncMock(return_value=ModerationResult(
         flagged=False,  # OpenAI says safe
-        categories={ToxicityCategory.HATE: False, ToxicityCategory.HARASSMENT: False},
-        category_scores={ToxicityCategory.HATE: 0.01, ToxicityCategory.HARASSMENT: 0.02},
+        categories=dict(_ALL_SAFE_CATEGORIES),
+        category_scores=dict(_ALL_SAFE_SCORES),
         provider="openai",
         content_type=ContentType.TEXT
     ))
     
     combined_provider.providers["anthropic"].moderate_content = AsyncMock(return_value=ModerationResult(
         flagged=True,  # Anthropic says unsafe
-        categories={ToxicityCategory.HATE: True, ToxicityCategory.HARASSMENT: False},
-        category_scores={ToxicityCategory.HATE: 0.78, ToxicityCategory.HARASSMENT: 0.02},
+        categories={**_ALL_SAFE_CATEGORIES, ToxicityCategory.HATE: True},
+        category_scores={**_ALL_SAFE_SCORES, ToxicityCategory.HATE: 0.78},
         provider="anthropic",
         content_type=ContentType.TEXT
     ))
     
     combined_provider.providers["detoxify"].moderate_content = AsyncMock(return_value=ModerationResult(
         flagged=False,  # Detoxify says safe
-        categories={ToxicityCategory.HATE: False, ToxicityCategory.HARASSMENT: False},
-        category_scores={ToxicityCategory.HATE: 0.45, ToxicityCategory.HARASSMENT: 0.02},
+        categories=dict(_ALL_SAFE_CATEGORIES),
+        category_scores={**_ALL_SAFE_SCORES, ToxicityCategory.HATE: 0.45},
         provider="detoxify",
         content_type=ContentType.TEXT
     ))
@@ -351,9 +398,40 @@ async def test_moderate_content_combined_one_flags(combined_provider):
     # Verify the maximum score was taken
     assert result.category_scores.get(ToxicityCategory.HATE) == 0.78
     
-    # Verify providers were called
-    for provider in combined_provider.providers.values():
-        provider.moderate_content.assert_called_once()
+    # Verify each provider was awaited exactly once
+    assert all(p.moderate_content.call_count == 1 for p in combined_provider.providers.values())
+
+@pytest.mark.asyncio
+async def test_moderate_content_combined_runs_providers_concurrently(combined_provider):
+    """Test that the combined provider queries all providers at the same time."""
+    all_started = asyncio.Event()
+    started = []
+    
+    def concurrent_provider(provider_name):
+        async def moderate_content(content, **kwargs):
+            started.append(provider_name)
+            if len(started) == len(combined_provider.providers):
+                all_started.set()
+            # Sequential awaits would never reach the last provider, so this wait would time out
+            await asyncio.wait_for(all_started.wait(), timeout=1)
+            return ModerationResult(
+                flagged=provider_name == "anthropic",
+                categories={ToxicityCategory.HATE: provider_name == "anthropic"},
+                category_scores={ToxicityCategory.HATE: 0.8 if provider_name == "anthropic" else 0.01},
+                provider=provider_name,
+                content_type=ContentType.TEXT
+            )
+        return moderate_content
+    
+    for provider_name, provider in combined_provider.providers.items():
+        provider.moderate_content = concurrent_provider(provider_name)
+    
+    result = await combined_provider.moderate_content(UNSAFE_TEXT, providers=["openai", "anthropic", "detoxify"])
+    
+    # Every provider answered, so the flag from Anthropic is present in the combined result
+    assert sorted(started) == ["anthropic", "detoxify", "openai"]
+    assert result.flagged is True
+    assert result.category_scores.get(ToxicityCategory.HATE) == 0.8
 
 @pytest.mark.asyncio
 async def test_moderation_service_selection(moderation_service):
@@ -361,16 +439,16 @@ async def test_moderation_service_selection(moderation_service):
     # Set up mock results for each provider
     safe_result = ModerationResult(
         flagged=False,
-        categories={ToxicityCategory.HATE: False},
-        category_scores={ToxicityCategory.HATE: 0.01},
+        categories=dict(_ALL_SAFE_CATEGORIES),
+        category_scores=dict(_ALL_SAFE_SCORES),
         provider="test",
         content_type=ContentType.TEXT
     )
     
     unsafe_result = ModerationResult(
         flagged=True,
-        categories={ToxicityCategory.HATE: True},
-        category_scores={ToxicityCategory.HATE: 0.85},
+        categories={**_ALL_SAFE_CATEGORIES, ToxicityCategory.HATE: True},
+        category_scores={**_ALL_SAFE_SCORES, ToxicityCategory.HATE: 0.85},
         provider="test",
         content_type=ContentType.TEXT
     )
@@ -387,7 +465,7 @@ async def test_moderation_service_selection(moderation_service):
         moderation_type=ModerationType.OPENAI
     )
     assert result_openai.flagged is False
-    moderation_service.providers[ModerationType.OPENAI].moderate_content.assert_called_once()
+    _called_once(moderation_service.providers[ModerationType.OPENAI].moderate_content)
     
     # Test Anthropic provider selection
     result_anthropic = await moderation_service.moderate_content(
@@ -395,14 +473,14 @@ async def test_moderation_service_selection(moderation_service):
         moderation_type=ModerationType.ANTHROPIC
     )
     assert result_anthropic.flagged is True
-    moderation_service.providers[ModerationType.ANTHROPIC].moderate_content.assert_called_once()
+    _called_once(moderation_service.providers[ModerationType.ANTHROPIC].moderate_content)
     
     # Test Combined provider selection (default)
     result_combined = await moderation_service.moderate_content(
         "Test content"  # ModerationType.COMBINED is the default
     )
     assert result_combined.flagged is True
-    moderation_service.providers[ModerationType.COMBINED].moderate_content.assert_called_once()
+    _called_once(moderation_service.providers[ModerationType.COMBINED].moderate_content)
 
 @pytest.mark.asyncio
 async def test_moderate_content_with_list_input(moderation_service):
@@ -410,8 +488,8 @@ async def test_moderate_content_with_list_input(moderation_service):
     # Set up mock result
     safe_result = ModerationResult(
         flagged=False,
-        categories={ToxicityCategory.HATE: False},
-        category_scores={ToxicityCategory.HATE: 0.01},
+        categories=dict(_ALL_SAFE_CATEGORIES),
+        category_scores=dict(_ALL_SAFE_SCORES),
         provider="test",
         content_type=ContentType.TEXT
     )
@@ -426,10 +504,229 @@ async def test_moderate_content_with_list_input(moderation_service):
     # Assertions
     assert result is safe_result
     # Vérifier uniquement que la fonction a été appelée avec le bon texte
-    moderation_service.providers[ModerationType.COMBINED].moderate_content.assert_called_once()
+    _called_once(moderation_service.providers[ModerationType.COMBINED].moderate_content)
     call_args = moderation_service.providers[ModerationType.COMBINED].moderate_content.call_args[0]
     assert call_args[0] == texts
 
+@pytest.mark.asyncio
+async def test_openai_moderate_batch_single_call(openai_provider):
+    """Test that the OpenAI provider moderates a list of texts in one API call."""
+    response = _FakeOAIResponse(results=_SAFE_OAI.results + _UNSAFE_OAI.results)
+    openai_provider.client.moderations.create = AsyncMock(return_value=response)
+    
+    results = await openai_provider.moderate_batch([SAFE_TEXT, UNSAFE_TEXT])
+    
+    openai_provider.client.moderations.create.assert_awaited_once_with(input=[SAFE_TEXT, UNSAFE_TEXT])
+    assert [result.flagged for result in results] == [False, True]
+
+@pytest.mark.asyncio
+async def test_moderate_batch_chunks_texts(moderation_service):
+    """Test that moderate_batch sends at most max_batch_size texts per provider call."""
+    def batch_results(texts, **kwargs):
+        return [
+            ModerationResult(
+                flagged=text == UNSAFE_TEXT,
+                categories={ToxicityCategory.HATE: text == UNSAFE_TEXT},
+                category_scores={ToxicityCategory.HATE: 0.8 if text == UNSAFE_TEXT else 0.01},
+                provider="test",
+                content_type=ContentType.TEXT
+            )
+            for text in texts
+        ]
+    
+    combined = moderation_service.providers[ModerationType.COMBINED]
+    combined.moderate_batch = AsyncMock(side_effect=batch_results)
+    moderation_service.max_batch_size = 2
+    
+    texts = ["Text 1", UNSAFE_TEXT, "Text 3"]
+    results = await moderation_service.moderate_batch(texts)
+    
+    # One provider call per chunk, never one per text
+    assert [call.args[0] for call in combined.moderate_batch.await_args_list] == [["Text 1", UNSAFE_TEXT], ["Text 3"]]
+    assert isinstance(results, list)
+    assert [result.flagged for result in results] == [False, True, False]
+    assert len({result.moderation_id for result in results}) == len(texts)
+    
+    # A second batch with the same texts is served from the cache
+    await moderation_service.moderate_batch(texts)
+    assert combined.moderate_batch.await_count == 2
+
+@pytest.mark.asyncio
+async def test_moderate_content_cached_for_identical_content(moderation_service):
+    """Test that moderating identical content twice only calls the provider once."""
+    safe_result = ModerationResult(
+        flagged=False,
+        categories=dict(_ALL_SAFE_CATEGORIES),
+        category_scores=dict(_ALL_SAFE_SCORES),
+        provider="test",
+        content_type=ContentType.TEXT
+    )
+    moderation_service.providers[ModerationType.COMBINED].moderate_content = AsyncMock(return_value=safe_result)
+    
+    first = await moderation_service.moderate_content(SAFE_TEXT)
+    second = await moderation_service.moderate_content(SAFE_TEXT)
+    
+    # Same verdict, but each call keeps its own moderation ID
+    assert first.flagged == second.flagged
+    assert first.moderation_id != second.moderation_id
+    _called_once(moderation_service.providers[ModerationType.COMBINED].moderate_content)
+    
+    # Different content is not served from the cache
+    await moderation_service.moderate_content(UNSAFE_TEXT)
+    assert moderation_service.providers[ModerationType.COMBINED].moderate_content.call_count == 2
+
+@pytest.mark.asyncio
+async def test_moderate_content_cache_entry_expires(moderation_service):
+    """Test that an expired cache entry sends the content to the provider again."""
+    safe_result = ModerationResult(
+        flagged=False,
+        categories=dict(_ALL_SAFE_CATEGORIES),
+        category_scores=dict(_ALL_SAFE_SCORES),
+        provider="test",
+        content_type=ContentType.TEXT
+    )
+    moderation_service.providers[ModerationType.COMBINED].moderate_content = AsyncMock(return_value=safe_result)
+    # Entries expire as soon as they are stored
+    moderation_service._result_cache_ttl = 0
+    
+    await moderation_service.moderate_content(SAFE_TEXT)
+    await moderation_service.moderate_content(SAFE_TEXT)
+    
+    assert moderation_service.providers[ModerationType.COMBINED].moderate_content.await_count == 2
+
+@pytest.mark.asyncio
+async def test_moderate_content_degraded_result_not_cached(moderation_service):
+    """Test that a combined result missing a failed provider is not cached."""
+    degraded_result = ModerationResult(
+        flagged=False,
+        categories=dict(_ALL_SAFE_CATEGORIES),
+        category_scores=dict(_ALL_SAFE_SCORES),
+        provider="combined",
+        content_type=ContentType.TEXT
+    )
+    degraded_result._complete = False
+    moderation_service.providers[ModerationType.COMBINED].moderate_content = AsyncMock(return_value=degraded_result)
+    
+    await moderation_service.moderate_content(SAFE_TEXT)
+    await moderation_service.moderate_content(SAFE_TEXT)
+    
+    assert moderation_service.providers[ModerationType.COMBINED].moderate_content.await_count == 2
+    assert not moderation_service._result_cache
+
+@pytest.mark.asyncio
+async def test_clear_cache(moderation_service):
+    """Test that clear_cache drops every cached result."""
+    safe_result = ModerationResult(
+        flagged=False,
+        categories=dict(_ALL_SAFE_CATEGORIES),
+        category_scores=dict(_ALL_SAFE_SCORES),
+        provider="test",
+        content_type=ContentType.TEXT
+    )
+    moderation_service.providers[ModerationType.COMBINED].moderate_content = AsyncMock(return_value=safe_result)
+    
+    await moderation_service.moderate_content(SAFE_TEXT)
+    moderation_service.clear_cache()
+    await moderation_service.moderate_content(SAFE_TEXT)
+    
+    assert moderation_service.providers[ModerationType.COMBINED].moderate_content.await_count == 2
+
+def _rate_limit_error():
+    """Build the error the OpenAI SDK raises on an HTTP 429."""
+    request = httpx.Request("POST", "https://api.openai.com/v1/moderations")
+    return openai.RateLimitError("Rate limit reached", response=httpx.Response(429, request=request), body=None)
+
+@pytest.mark.asyncio
+async def test_rate_limit_retry(openai_provider, monkeypatch):
+    """Test that a rate-limited call is retried with exponential backoff until it succeeds."""
+    monkeypatch.setattr("app.moderation.service.RATE_LIMIT_BASE_DELAY", 0.01)
+    openai_provider.client.moderations.create = AsyncMock(
+        side_effect=[_rate_limit_error(), _rate_limit_error(), _SAFE_OAI]
+    )
+    
+    start_time = time.perf_counter()
+    result = await openai_provider.moderate_content(SAFE_TEXT)
+    elapsed = time.perf_counter() - start_time
+    
+    assert result.flagged is False
+    assert openai_provider.client.moderations.create.await_count == 3
+    # Backoff before the 2nd and 3rd attempts: base, then 2 x base (plus jitter)
+    assert elapsed >= 0.01 + 0.02
+
+@pytest.mark.asyncio
+async def test_rate_limit_retry_gives_up(openai_provider, monkeypatch):
+    """Test that the rate limit error is raised once every attempt has failed."""
+    monkeypatch.setattr("app.moderation.service.RATE_LIMIT_BASE_DELAY", 0.001)
+    openai_provider.client.moderations.create = AsyncMock(side_effect=_rate_limit_error())
+    
+    with pytest.raises(openai.RateLimitError):
+        await openai_provider.moderate_content(SAFE_TEXT)
+    assert openai_provider.client.moderations.create.await_count == 3
+
+def _api_error(error_class, status_code):
+    """Build the error the OpenAI SDK raises on the given HTTP status."""
+    request = httpx.Request("POST", "https://api.openai.com/v1/moderations")
+    return error_class("API error", response=httpx.Response(status_code, request=request), body=None)
+
+@pytest.mark.parametrize("error", [
+    _api_error(openai.InternalServerError, 503),
+    openai.APIConnectionError(request=httpx.Request("POST", "https://api.openai.com/v1/moderations")),
+    openai.APITimeoutError(request=httpx.Request("POST", "https://api.openai.com/v1/moderations")),
+], ids=["server_error", "connection_error", "timeout"])
+@pytest.mark.asyncio
+async def test_transient_error_retry(openai_provider, monkeypatch, error):
+    """Test that transient errors (the ones the SDK would retry itself) are retried too."""
+    monkeypatch.setattr("app.moderation.service.RATE_LIMIT_BASE_DELAY", 0.001)
+    openai_provider.client.moderations.create = AsyncMock(side_effect=[error, _SAFE_OAI])
+    
+    result = await openai_provider.moderate_content(SAFE_TEXT)
+    
+    assert result.flagged is False
+    assert openai_provider.client.moderations.create.await_count == 2
+
+@pytest.mark.asyncio
+async def test_client_error_not_retried(openai_provider):
+    """Test that a non-transient API error is raised without any new attempt."""
+    openai_provider.client.moderations.create = AsyncMock(side_effect=_api_error(openai.BadRequestError, 400))
+    
+    with pytest.raises(openai.BadRequestError):
+        await openai_provider.moderate_content(SAFE_TEXT)
+    _called_once(openai_provider.client.moderations.create)
+
+@pytest.mark.asyncio
+async def test_token_bucket_spaces_calls():
+    """Test that the token bucket delays calls beyond its burst capacity."""
+    bucket = _TokenBucket(rate=100, capacity=1)
+    
+    start_time = time.perf_counter()
+    for _ in range(3):
+        await bucket.acquire()
+    elapsed = time.perf_counter() - start_time
+    
+    # The first token is immediate, the next two wait about 1/rate each
+    assert elapsed >= 0.015
+
+@pytest.mark.asyncio
+async def test_provider_aclose_closes_client(openai_provider):
+    """Test that closing a provider closes its async API client."""
+    openai_provider.client.close = AsyncMock()
+    
+    await openai_provider.aclose()
+    
+    _called_once(openai_provider.client.close)
+
+@pytest.mark.asyncio
+async def test_moderation_service_async_context_closes_providers(moderation_service):
+    """Test that leaving the service's async context closes every provider."""
+    for provider in moderation_service.providers.values():
+        provider.aclose = AsyncMock()
+    
+    async with moderation_service as service:
+        assert service is moderation_service
+    
+    for provider in moderation_service.providers.values():
+        _called_once(provider.aclose)
+
 @pytest.mark.asyncio
 async def test_error_handling_invalid_provider(moderation_service):
     """Test error handling when an invalid provider is specified."""
@@ -476,3 +773,5 @@ async def test_provider_failure_handling(combined_provider):
     # Should still have results from the other providers
     assert ToxicityCategory.HATE in result.categories
     assert ToxicityCategory.HARASSMENT in result.categories
+    # The verdict lacks OpenAI's answer: it is flagged as incomplete so it is never cached
+    assert result._complete is False